@@ -0,0 +1,93 @@
+"""
+CPU cost per stream of the three ways a track can reach Discord:
+
+  pcm          FFmpeg decodes to PCM, the bot Opus-encodes every 20 ms frame (the old path)
+  encode       FFmpeg encodes to Opus itself (non-Opus inputs)
+  passthrough  FFmpeg remuxes an Opus input with codec copy (YouTube WebM audio)
+
+Each mode plays N streams concurrently, as fast as they can be read, from a
+generated Opus/WebM file. Needs ffmpeg on PATH and libopus for the pcm mode
+(found by ctypes.util.find_library, or named by the OPUS_LIBRARY variable).
+
+    python benchmarks/audio_bench.py [concurrent streams] [seconds of audio]
+
+Unverified: this has not been run yet, so no baseline numbers are recorded.
+"""
+import ctypes.util
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import discord
+import discord.opus
+
+def make_input(path, seconds):
+    subprocess.run(
+        ["ffmpeg", "-loglevel", "error", "-y", "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+         "-ac", "2", "-ar", "48000", "-c:a", "libopus", "-b:a", "128k", path],
+        check=True,
+    )
+
+def drain(source, encoder):
+    # Mirrors discord.py's AudioPlayer loop minus the real-time sleeps
+    while True:
+        frame = source.read()
+        if not frame:
+            break
+        if encoder is not None:
+            encoder.encode(frame, discord.opus.Encoder.SAMPLES_PER_FRAME)
+    source.cleanup()
+
+def open_source(mode, path):
+    if mode == "pcm":
+        return discord.FFmpegPCMAudio(path, options="-vn"), discord.opus.Encoder()
+    if mode == "encode":
+        return discord.FFmpegOpusAudio(path, bitrate=128, options="-vn"), None
+    return discord.FFmpegOpusAudio(path, codec="copy", options="-vn"), None
+
+def run(mode, path, streams):
+    before = os.times()
+    start = time.perf_counter()
+    threads = []
+    for _ in range(streams):
+        source, encoder = open_source(mode, path)
+        thread = threading.Thread(target=drain, args=(source, encoder))
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    after = os.times()
+    bot_cpu = (after.user - before.user) + (after.system - before.system)
+    ffmpeg_cpu = (after.children_user - before.children_user) + (after.children_system - before.children_system)
+    return wall, bot_cpu, ffmpeg_cpu
+
+def main():
+    streams = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    seconds = int(sys.argv[2]) if len(sys.argv) > 2 else 120
+    modes = ["pcm", "encode", "passthrough"]
+    library = os.environ.get("OPUS_LIBRARY") or ctypes.util.find_library("opus")
+    if not discord.opus.is_loaded() and library:
+        try:
+            discord.opus.load_opus(library)
+        except OSError:
+            pass
+    if not discord.opus.is_loaded():
+        print("libopus not found; skipping the pcm mode")
+        modes.remove("pcm")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "input.webm")
+        make_input(path, seconds)
+        print(f"{streams} concurrent stream(s) x {seconds}s of audio")
+        print(f"{'mode':<12} {'wall s':>8} {'bot cpu s':>10} {'ffmpeg cpu s':>13} {'cpu ms / audio min / stream':>28}")
+        for mode in modes:
+            wall, bot_cpu, ffmpeg_cpu = run(mode, path, streams)
+            per_stream = (bot_cpu + ffmpeg_cpu) * 1000 / streams / (seconds / 60)
+            print(f"{mode:<12} {wall:>8.2f} {bot_cpu:>10.2f} {ffmpeg_cpu:>13.2f} {per_stream:>28.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Compare the legacy flat-file state (queue.csv / users.txt) with the current
+engines on the bot's hot operations: the in-memory per-guild queue with its
+SQLite journal, and the SQLite known-user index.
+
+    python benchmarks/storage_bench.py [queue size] [known users]
+"""
+import csv
+import json
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bot.services.queues import GuildQueue
+from core.storage import Storage
+
+QUEUE_FIELDS = ["id", "track_id", "song_link", "title", "artist", "requestor_userid", "datetime_now"]
+
+def make_track(i):
+    return {
+        "id": "",
+        "track_id": f"t{i:07d}",
+        "song_link": f"https://www.youtube.com/watch?v={i:011d}",
+        "title": f"Song {i}",
+        "artist": f"Artist {i % 97}",
+        "requestor_userid": str(100000000000000000 + i),
+        "datetime_now": "2025-01-01T00:00:00",
+    }
+
+def make_users(n):
+    chars = string.ascii_lowercase
+    return [(100000000000000000 + i, "".join(random.choices(chars, k=10))) for i in range(n)]
+
+# ----- Flat files (the old implementation) -----
+
+class FlatFiles:
+    def __init__(self, directory):
+        self.queue_file = os.path.join(directory, "queue.csv")
+        self.users_file = os.path.join(directory, "users.txt")
+        with open(self.queue_file, "w", newline="") as f:
+            csv.writer(f).writerow(QUEUE_FIELDS)
+
+    def _rows(self):
+        with open(self.queue_file, newline="") as f:
+            return list(csv.DictReader(f))
+
+    def _write(self, rows):
+        with open(self.queue_file, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=QUEUE_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+
+    def enqueue_track(self, track):
+        existing = {row["track_id"] for row in self._rows()}  # generate_track_id scanned the file
+        assert track["track_id"] not in existing
+        with open(self.queue_file, "a", newline="") as f:
+            csv.DictWriter(f, fieldnames=QUEUE_FIELDS).writerow(track)
+
+    def pop_next_track(self):
+        rows = self._rows()
+        track = rows.pop(0)
+        self._write(rows)
+        return track
+
+    def bump_track(self, track_id):
+        rows = self._rows()
+        for idx, row in enumerate(rows):
+            if row["track_id"] == track_id:
+                rows.insert(0, rows.pop(idx))
+                break
+        self._write(rows)
+
+    def remove_track(self, track_id):
+        self._write([row for row in self._rows() if row["track_id"] != track_id])
+
+    def member_joined(self, users, i):
+        # every change rewrote the whole sorted users.txt
+        lines = sorted((f"{name} ({uid})" for uid, name in users), key=str.lower)
+        with open(self.users_file, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+
+# ----- Harness -----
+
+def timed(label, fn, repeat):
+    start = time.perf_counter()
+    for i in range(repeat):
+        fn(i)
+    elapsed = (time.perf_counter() - start) * 1000
+    return label, elapsed / repeat
+
+# ----- Current engines -----
+
+class JournalledQueue:
+    """GuildQueue plus its journal write, done synchronously as the storage worker would."""
+
+    def __init__(self, storage):
+        self.storage = storage
+        self.queue = GuildQueue(1)
+
+    def enqueue_track(self, track):
+        self.queue.append(track)
+        self.storage.append_queue_journal([(1, "add", track["track_id"], json.dumps(track))])
+
+    def pop_next_track(self):
+        track = self.queue.popleft()
+        self.storage.append_queue_journal([(1, "remove", track["track_id"], None)])
+        return track
+
+    def bump_track(self, track_id):
+        if self.queue.bump(track_id):
+            self.storage.append_queue_journal([(1, "bump", track_id, None)])
+
+    def remove_track(self, track_id):
+        if self.queue.remove(track_id):
+            self.storage.append_queue_journal([(1, "remove", track_id, None)])
+
+    def member_joined(self, users, i):
+        self.storage.add_guild_member(1, 200000000000000000 + i, f"newcomer{i}")
+
+def run(backend, queue_size, users):
+    for i in range(queue_size):
+        backend.enqueue_track(make_track(i))
+    next_id = queue_size
+    ops = 200
+
+    def enqueue(i):
+        backend.enqueue_track(make_track(next_id + i))
+
+    results = [
+        timed("enqueue", enqueue, ops),
+        timed("bump", lambda i: backend.bump_track(f"t{random.randrange(queue_size):07d}"), ops),
+        timed("remove", lambda i: backend.remove_track(f"t{queue_size - 1 - i:07d}"), ops),
+        timed("pop", lambda i: backend.pop_next_track(), ops),
+        timed("member join", lambda i: backend.member_joined(users, i), 20),
+    ]
+    return results
+
+def main():
+    queue_size = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    user_count = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    users = make_users(user_count)
+
+    with tempfile.TemporaryDirectory() as directory:
+        random.seed(1)
+        flat = run(FlatFiles(directory), queue_size, users)
+        random.seed(1)
+        storage = Storage(os.path.join(directory, "bench.db"))
+        storage.reconcile_guild(1, users)
+        current = run(JournalledQueue(storage), queue_size, users)
+        storage.close()
+
+    print(f"queue={queue_size} tracks, known users={user_count} (mean ms per op)")
+    print(f"{'operation':<12} {'flat files':>12} {'current':>10} {'speedup':>9}")
+    for (label, flat_ms), (_, current_ms) in zip(flat, current):
+        print(f"{label:<12} {flat_ms:>12.3f} {current_ms:>10.3f} {flat_ms / current_ms:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Time to choose the /profile font size for a set of badge lines:
+
+  linear   the old loop: from 40 down to 10, parse the font at each size and
+           measure every line with textbbox until they all fit
+  search   TextLayout.fit: binary search over sizes, fonts from a pool, widths
+           summed from cached per-glyph advances (cold: empty caches each run;
+           warm: caches kept, as on a running bot)
+
+    python benchmarks/text_layout_bench.py <font.ttf> [runs]
+"""
+import io
+import os
+import sys
+import time
+
+from PIL import Image, ImageDraw, ImageFont
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bot.services.text_layout import TextLayout
+
+WIDTH = 410
+LINES = [
+    "Username: a_rather_long_na",
+    "Display Name: Someone Whose Name (Nickname Here!)",
+    "Discord ID: 123456789012345678",
+    "Discord member since: 2017-03-14",
+    "Server member since: 2020-11-02",
+    "Playing Some Game With A Very Long Title",
+]
+
+def linear(font_bytes):
+    draw = ImageDraw.Draw(Image.new("RGBA", (900, 450)))
+    size = 40
+    while True:
+        font = ImageFont.truetype(io.BytesIO(font_bytes), size)
+        if all(draw.textbbox((0, 0), line, font=font)[2] <= WIDTH for line in LINES) or size <= 10:
+            return size
+        size -= 1
+
+def search(layout, fonts, font_bytes):
+    def load(size):
+        font = fonts.get(size)
+        if font is None:
+            font = fonts[size] = ImageFont.truetype(io.BytesIO(font_bytes), size)
+        return font
+    return layout.fit("bench", load, LINES, WIDTH).size
+
+def bench(name, fn, runs):
+    start = time.perf_counter()
+    for _ in range(runs):
+        size = fn()
+    elapsed = (time.perf_counter() - start) / runs * 1000
+    print(f"{name:<14} {elapsed:8.3f} ms/badge  (size {size})")
+    return elapsed
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    with open(sys.argv[1], "rb") as f:
+        font_bytes = f.read()
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    base = bench("linear", lambda: linear(font_bytes), runs)
+    cold = bench("search cold", lambda: search(TextLayout(), {}, font_bytes), runs)
+    layout, fonts = TextLayout(), {}
+    warm = bench("search warm", lambda: search(layout, fonts, font_bytes), runs)
+    print(f"speedup: {base / cold:.1f}x cold, {base / warm:.0f}x warm")
+
+if __name__ == "__main__":
+    main()
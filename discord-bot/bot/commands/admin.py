@@ -6,7 +6,6 @@ import os
 import random
 import re
 import sys
-import csv
 from datetime import datetime
 
 from bs4 import BeautifulSoup
@@ -17,7 +16,8 @@ import discord
 import psutil
 from discord.ext import commands
 from discord import app_commands
-from core.logger import log_action
+from core.logger import log_action, query_audit_log
+from core import metrics
 
 class EvalPager(discord.ui.View):
     def __init__(self, pages):
@@ -150,6 +150,9 @@ class Admin(commands.Cog):
         embed.add_field(name="CPU Usage", value=f"{cpu:.2f}%", inline=True)
         embed.add_field(name="Memory Usage", value=f"{mem:.2f} MB", inline=True)
         embed.add_field(name="Event Loop Lag", value=f"{lag_ms:.2f} ms", inline=True)
+        for name, values in metrics.snapshot().items():
+            lines = "\n".join(f"{k}: {v}" for k, v in values.items())
+            embed.add_field(name=name, value=lines[:1024] or "n/a", inline=False)
         await interaction.response.send_message(embed=embed, ephemeral=True)
         await log_action(self.bot, interaction)
 
@@ -253,7 +256,7 @@ class Admin(commands.Cog):
 
     @dev.command(
         name="sessions",
-        description="Display session data from sessions.csv"
+        description="Display recorded bot sessions"
     )
     @app_commands.check(lambda inter: inter.user.id == BOT_OWNER_ID)
     async def sessions(self, interaction: discord.Interaction):
@@ -261,15 +264,13 @@ class Admin(commands.Cog):
         try:
             # load all sessions
             sessions = []
-            with open("sessions.csv", "r", encoding="utf-8") as csvfile:
-                reader = csv.DictReader(csvfile)
-                for row in reader:
-                    ts = int(datetime.fromisoformat(row["datetime_now"]).timestamp())
-                    sessions.append({
-                        "id": row["id"],
-                        "session_id": row["session_id"],
-                        "timestamp": f"<t:{ts}:F>"
-                    })
+            for row in await self.bot.storage.list_sessions():
+                ts = int(datetime.fromisoformat(row["datetime_now"]).timestamp())
+                sessions.append({
+                    "id": row["id"],
+                    "session_id": row["session_id"],
+                    "timestamp": f"<t:{ts}:F>"
+                })
 
             if not sessions:
                 return await interaction.response.send_message("No session data found.", ephemeral=True)
@@ -280,12 +281,42 @@ class Admin(commands.Cog):
             first_embed = pager._make_embed()
 
             await interaction.response.send_message(embed=first_embed, view=pager, ephemeral=True)
-        except FileNotFoundError:
-            await interaction.response.send_message("❌ `sessions.csv` file not found.", ephemeral=True)
         except Exception as e:
             await interaction.response.send_message(f"❌ Error: {e}", ephemeral=True)
         await log_action(self.bot, interaction)
 
+    @dev.command(
+        name="logs",
+        description="Show recent commands from the local audit log"
+    )
+    @app_commands.describe(
+        user="Only show commands run by this user",
+        limit="Number of records to show (max 25)"
+    )
+    @app_commands.check(lambda inter: inter.user.id == BOT_OWNER_ID)
+    async def logs(self, interaction: discord.Interaction, user: discord.User = None, limit: int = 10):
+        """Usage: /dev logs [user] [limit]"""
+        limit = max(1, min(limit, 25))
+        records = await query_audit_log(user_id=user.id if user else None, limit=limit)
+        if not records:
+            return await interaction.response.send_message("No audit records found.", ephemeral=True)
+
+        title = f"Last {len(records)} commands" + (f" by {user}" if user else "")
+        embed = discord.Embed(title=title, color=discord.Color.blurple())
+        for record in records:
+            name = f"/{record['command']}" + (" (error)" if record["kind"] == "error" else "")
+            value = (
+                f"<t:{int(record['ts'])}:F>\n"
+                f"User: {record['user']} ({record['user_id']})\n"
+                f"Server: {record['guild']} ({record['guild_id']})\n"
+                f"Channel: {record['channel']} ({record['channel_id']})"
+            )
+            if record.get("error"):
+                value += f"\nError: {record['error'][:200]}"
+            embed.add_field(name=name, value=value, inline=False)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        await log_action(self.bot, interaction)
+
 async def setup(bot: commands.Bot):
     guild1 = discord.Object(id=LOG_GUILD_ID)
     guild2 = discord.Object(id=576590416296542249)
@@ -2,12 +2,19 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import random
-import requests
 from core.logger import log_action
+from bot.services.animals import AnimalImageProvider
 
 class Fun(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.images = AnimalImageProvider(bot.http_client)
+
+    async def cog_load(self):
+        self.images.start()
+
+    async def cog_unload(self):
+        await self.images.close()
 
     # List of possible responses for the 8ball command
     responses = [
@@ -69,8 +76,10 @@ class Fun(commands.Cog):
 
     @app_commands.command(name="cat", description="You like kitties, don't you? This command shows you a random cat image.")
     async def cat(self, interaction: discord.Interaction):
-        response = requests.get("https://api.thecatapi.com/v1/images/search").json()
-        image_url = response[0]["url"]
+        try:
+            image_url = await self.images.get("cat")
+        except LookupError as e:
+            return await interaction.response.send_message(f"❌ {e} Please try again later.", ephemeral=True)
         embed = discord.Embed(title="🐱 Meow!", color=discord.Color(random.randint(0, 0xFFFFFF)))
         embed.set_image(url=image_url)
         await interaction.response.send_message(embed=embed)
@@ -78,8 +87,10 @@ class Fun(commands.Cog):
     
     @app_commands.command(name="dog", description="You like puppies, don't you? This command shows you a random dog image.")
     async def dog(self, interaction: discord.Interaction):
-        response = requests.get("https://api.thedogapi.com/v1/images/search").json()
-        image_url = response[0]["url"]
+        try:
+            image_url = await self.images.get("dog")
+        except LookupError as e:
+            return await interaction.response.send_message(f"❌ {e} Please try again later.", ephemeral=True)
         embed = discord.Embed(title="🐶 Woof!", color=discord.Color(random.randint(0, 0xFFFFFF)))
         embed.set_image(url=image_url)
         await interaction.response.send_message(embed=embed)
@@ -87,12 +98,13 @@ class Fun(commands.Cog):
 
     @app_commands.command(name="fox", description="Yip? This command shows you a random fluffy fox image.")
     async def fox(self, interaction: discord.Interaction):
-        response = requests.get("https://randomfox.ca/floof/").json()
-        image_url = response["image"]
+        try:
+            image_url = await self.images.get("fox")
+        except LookupError as e:
+            return await interaction.response.send_message(f"❌ {e} Please try again later.", ephemeral=True)
         embed = discord.Embed(title="🦊 Yip!", color=discord.Color(random.randint(0, 0xFFFFFF)))
         embed.set_image(url=image_url)
         await interaction.response.send_message(embed=embed)
-        await interaction.response.send_message(image_url)
         await log_action(self.bot, interaction)
 
 async def setup(bot):
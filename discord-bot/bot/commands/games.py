@@ -1,26 +1,13 @@
 import random
-import aiohttp
 import discord
 import chess
 from discord import app_commands
 from discord.ext import commands
 from core.logger import log_action
+from bot.services.wordlist import WordlistStore
+from bot.services.trivia import TriviaPool
 
-# Load wordlist for hangman and wordle from external CDN
-# wordlist.json maps string lengths to lists of words
-import requests
-
-def load_wordlist(length=None):
-    url = 'https://cdn.augystudios.com/hellobot/wordlist.json'
-    resp = requests.get(url)
-    data = resp.json()
-    if length:
-        return [w.lower() for w in data.get(str(length), [])]
-    all_words = []
-    for lst in data.values():
-        if isinstance(lst, list):
-            all_words.extend(lst)
-    return [w.lower() for w in all_words]
+COUNTRIES_UNAVAILABLE = "⚠️ Country data unavailable. Please try again later."
 
 # ----------------------------------------
 # Game Sessions and Manager
@@ -29,6 +16,8 @@ class GameManager:
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.sessions = {}  # message_id -> session
+        self.wordlist = WordlistStore(bot.http_client)
+        self.trivia = TriviaPool(bot.http_client)
 
     async def start_game(self, interaction: discord.Interaction, game_key: str, *args):
         session_map = {
@@ -54,7 +43,8 @@ class GameManager:
             )
         session = SessionClass(self, interaction, *args)
         message = await session.start()
-        self.sessions[message.id] = session
+        if message is not None:
+            self.sessions[message.id] = session
 
     async def handle_interaction(self, interaction: discord.Interaction):
         session = self.sessions.get(interaction.message.id)
@@ -89,8 +79,8 @@ class BaseSession:
             await self.ctx.response.send_message(embed=embed, view=view)
             # Then fetch the message we just sent
             msg = await self.ctx.original_response()
-        except discord.errors.HTTPException:
-            # If we've already replied (e.g. via a button), fall back to followup
+        except (discord.errors.HTTPException, discord.errors.InteractionResponded):
+            # If we've already replied or deferred (e.g. via a button), fall back to followup
             msg = await self.ctx.followup.send(embed=embed, view=view)
 
         self.message = msg
@@ -313,8 +303,8 @@ class HangmanSession(BaseSession):
     MAX_WRONG = 6
     def __init__(self, manager, interaction, length: int = None):
         super().__init__(manager, interaction)
-        words = load_wordlist(length)
-        self.word = random.choice(words)
+        # fall back to any length if there are no words of the requested one
+        self.word = manager.wordlist.random_word(length) or manager.wordlist.random_word()
         self.guessed = set()
         self.wrong = 0
 
@@ -389,8 +379,11 @@ class WordleSession(BaseSession):
     MAX_GUESSES = 6
     def __init__(self, manager, interaction, length: int = 5):
         super().__init__(manager, interaction)
-        words = load_wordlist(length)
-        self.target = random.choice(words)
+        target = manager.wordlist.random_word(length)
+        if target is None:
+            # no words of that length; play the classic 5-letter game instead
+            length, target = 5, manager.wordlist.random_word(5)
+        self.target = target
         self.length = length
         self.guesses = []
 
@@ -426,6 +419,10 @@ class WordleSession(BaseSession):
             return await interaction.response.send_message(
                 f"Word must be {self.length} letters.", ephemeral=True
             )
+        if not self.manager.wordlist.contains(word):
+            return await interaction.response.send_message(
+                f"**{word}** is not in the word list.", ephemeral=True
+            )
         self.guesses.append(word)
         if word == self.target:
             return await interaction.response.edit_message(
@@ -468,17 +465,21 @@ class TriviaSession(BaseSession):
         self.options = []
 
     async def start(self):
-        await self.fetch_question()
+        if not self.manager.trivia.ready(self.category):
+            # an empty pool waits on rate-limited opentdb calls; acknowledge before the interaction expires
+            await self.ctx.response.defer()
+        try:
+            await self.fetch_question()
+        except LookupError as e:
+            if self.ctx.response.is_done():
+                await self.ctx.followup.send(f"❌ {e}", ephemeral=True)
+            else:
+                await self.ctx.response.send_message(f"❌ {e}", ephemeral=True)
+            return None
         return await super().start()
 
     async def fetch_question(self):
-        url = 'https://opentdb.com/api.php?amount=1&type=multiple'
-        if self.category:
-            url += f'&category={self.category}'
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as r:
-                data = await r.json()
-        q = data['results'][0]
+        q = await self.manager.trivia.get(self.category)
         self.question = discord.utils.escape_markdown(q['question'])
         self.correct = q['correct_answer']
         opts = q['incorrect_answers'] + [q['correct_answer']]
@@ -523,17 +524,20 @@ class FlagMatchSession(BaseSession):
 
     async def start(self) -> discord.Message:
         # load four flags and pick the correct one
-        await self.fetch_flags()
+        countries = self.manager.bot.countries
+        await countries.wait_ready()
+        if not countries.flags:
+            await countries.refresh()
+        if len(countries.flags) < 4:
+            await self.ctx.response.send_message(COUNTRIES_UNAVAILABLE, ephemeral=True)
+            return None
+        self.pick_flags()
         # now self.correct is set, so render() will work
         return await super().start()
 
-    async def fetch_flags(self):
-        # get 4 random countries
-        async with aiohttp.ClientSession() as session:
-            async with session.get('https://restcountries.com/v3.1/all') as r:
-                data = await r.json()
-        choices = random.sample(data, 4)
-        self.flags   = [(c['name']['common'], c['flags']['png']) for c in choices]
+    def pick_flags(self):
+        # get 4 random countries from the in-memory dataset
+        self.flags   = self.manager.bot.countries.sample_flags(4)
         self.correct = random.choice(self.flags)
 
     def render(self):
@@ -590,7 +594,9 @@ class PlayAgainButton(discord.ui.Button):
 
     async def callback(self, interaction: discord.Interaction):
         # 1) Pick new flags
-        await self.session.fetch_flags()
+        if len(self.session.manager.bot.countries.flags) < 4:
+            return await interaction.response.send_message(COUNTRIES_UNAVAILABLE, ephemeral=True)
+        self.session.pick_flags()
         # 2) Build the fresh embed + buttons
         embed = self.session.render()
         view  = self.session.build_view()
@@ -733,6 +739,14 @@ class Games(commands.Cog):
         self.bot = bot
         self.manager = GameManager(bot)
 
+    async def cog_load(self):
+        await self.manager.wordlist.start()
+        self.manager.trivia.start()
+
+    async def cog_unload(self):
+        await self.manager.wordlist.close()
+        await self.manager.trivia.close()
+
     @app_commands.command(name="tictactoe", description="Play Tic-Tac-Toe with another user.")
     @app_commands.describe(opponent="Opponent (optional)")
     async def tictactoe(self, interaction: discord.Interaction, opponent: discord.Member = None):
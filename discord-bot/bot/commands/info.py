@@ -5,7 +5,7 @@ import platform
 import random
 from core.logger import log_action
 from config import BOT_OWNER_ID
-from user_utils import ensure_users_file, get_known_users
+from user_utils import get_known_users
 
 # Function to split long messages into pages
 def paginate_list(items, title):
@@ -44,7 +44,7 @@ class BotInfoView(ui.View):
 
     @ui.button(label="List Known Users", style=discord.ButtonStyle.primary, custom_id="list_users")
     async def list_users(self, interaction: discord.Interaction, button: ui.Button):
-        known_users = get_known_users()
+        known_users = await get_known_users(self.bot)
         await self.show_paginated_list(interaction, "Known Users", known_users)
 
     @ui.button(label="List Channels", style=discord.ButtonStyle.success, custom_id="list_channels")
@@ -132,8 +132,7 @@ class Info(commands.Cog):
 
     @app_commands.command(name="botinfo", description="Get detailed bot information.")
     async def botinfo(self, interaction: discord.Interaction):
-        ensure_users_file()  # Make sure the users.txt file is checked/created
-        known_users = get_known_users()  # Get users from users.txt
+        known_users_count = await self.bot.storage.count_known_users()
         total_channels = sum(len(guild.channels) for guild in self.bot.guilds)
         total_guilds = len(self.bot.guilds)
         
@@ -158,7 +157,7 @@ class Info(commands.Cog):
         embed.add_field(name="Shards", value=shard_count, inline=True)
         embed.add_field(name="Guilds", value=str(total_guilds), inline=True)
         embed.add_field(name="Channels", value=str(total_channels), inline=True)
-        embed.add_field(name="Known Users", value=str(len(known_users)), inline=True)
+        embed.add_field(name="Known Users", value=str(known_users_count), inline=True)
 
         # If the user is the bot owner, provide buttons to list users, channels, or guilds
         if interaction.user.id == BOT_OWNER_ID:
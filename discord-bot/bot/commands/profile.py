@@ -1,38 +1,36 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-import aiohttp
+import asyncio
 import io
-from PIL import Image, ImageDraw, ImageFont, ImageFilter
+from PIL import Image, ImageDraw, ImageFilter
 import qrcode
 import random
+from bot.services.cards import CardTemplate, DrawLayer, ImageLayer, StaticLayer
+from bot.services.fonts import FontCache
+from bot.services.images import ImageCache, asset_key
+from bot.services.render_cache import RenderCache, fingerprint
+from bot.services.text_layout import TextLayout
+from config import FONT_BUNDLED, FONT_CACHE_DIR, FONT_CACHE_MAX_BYTES, FONT_MAX_BYTES, FONT_POOL_SIZE, IMAGE_CACHE_MAX_BYTES, \
+    RENDER_CACHE_MAX_BYTES, RENDER_CACHE_DIR, RENDER_CACHE_DISK_MAX_BYTES
+from core import metrics
 from core.logger import log_action
 
 # --- Helper Functions ---
 
-async def download_bytes(url: str) -> io.BytesIO:
-    """Download bytes from a URL and return a BytesIO object."""
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as resp:
-            if resp.status == 200:
-                return io.BytesIO(await resp.read())
-    return None
-
-async def fetch_image(url: str) -> Image.Image:
-    """Download an image from a URL and return a Pillow Image in RGBA mode."""
-    try:
-        data = await download_bytes(url)
-        if data:
-            return Image.open(data).convert("RGBA")
-    except Exception as e:
-        print(f"Error fetching image from {url}: {e}")
-    return None
-
-async def get_fallback_avatar() -> Image.Image:
-    """Returns a fallback avatar image (using a placeholder image)."""
-    fallback_url = "https://i.augy.xyz/M0VoBqRny.svg"
-    image = await fetch_image(fallback_url)
-    return image
+BADGE_VERSION = 3  # bump when the badge layout changes so cached renders aren't reused
+
+# Badge geometry
+BADGE_SIZE = (900, 450)
+MARGIN = 20
+LINE_SPACING = 5
+TEXT_AREA_X = BADGE_SIZE[0] // 2 + MARGIN
+TEXT_AREA_WIDTH = BADGE_SIZE[0] - TEXT_AREA_X - MARGIN
+AVATAR_SIZE = (BADGE_SIZE[0] // 2 - 2 * MARGIN, BADGE_SIZE[1] - 2 * MARGIN)
+CORNER_RADIUS = 20
+BORDER_SIZE = 5
+QR_SIZE = 80
+QR_GUILD_ID = 576590416296542249  # GFTV badges carry a QR code to the site
 
 def create_rounded_mask(size: tuple, radius: int) -> Image.Image:
     """Create a rounded rectangle mask for a given size and corner radius."""
@@ -41,36 +39,148 @@ def create_rounded_mask(size: tuple, radius: int) -> Image.Image:
     draw.rounded_rectangle((0, 0) + size, radius=radius, fill=255)
     return mask
 
+def blur_banner(image: Image.Image, size: tuple) -> Image.Image:
+    """Resize a banner to the badge and blur it into a background."""
+    return image.resize(size).filter(ImageFilter.GaussianBlur(radius=10))
+
+def round_avatar(image: Image.Image, mask: Image.Image, background=(255, 255, 255, 255)) -> Image.Image:
+    """Flatten an avatar onto a background colour, resize it to the mask and round its corners."""
+    bg = Image.new("RGBA", image.size, background)
+    bg.paste(image, mask=image.split()[3])
+    avatar = bg.resize(mask.size)
+    avatar.putalpha(mask)
+    return avatar
+
+def avatar_border() -> Image.Image:
+    """The white rounded frame drawn behind the avatar."""
+    size = (AVATAR_SIZE[0] + 2 * BORDER_SIZE, AVATAR_SIZE[1] + 2 * BORDER_SIZE)
+    border = Image.new("RGBA", size, (0, 0, 0, 0))
+    ImageDraw.Draw(border).rounded_rectangle((0, 0) + size, radius=CORNER_RADIUS + BORDER_SIZE, fill="white")
+    return border
+
+def fallback_avatar() -> Image.Image:
+    """A plain head-and-shoulders silhouette for users without a fetchable avatar."""
+    width, height = AVATAR_SIZE
+    image = Image.new("RGBA", AVATAR_SIZE, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+    fill = (255, 255, 255, 160)
+    head = min(width, height) // 5
+    draw.ellipse((width // 2 - head, height * 2 // 5 - head, width // 2 + head, height * 2 // 5 + head), fill=fill)
+    draw.ellipse((width // 5, height * 7 // 10, width * 4 // 5, height * 13 // 10), fill=fill)
+    return image
+
+def site_qr_code() -> Image.Image:
+    return qrcode.make("https://globalfurry.tv/").get_image().resize((QR_SIZE, QR_SIZE)).convert("RGBA")
+
+def draw_text(badge: Image.Image, card: dict):
+    """The user info lines, top down from the top of the text area."""
+    draw = ImageDraw.Draw(badge)
+    current_y = MARGIN
+    for line in card["lines"]:
+        draw.text((TEXT_AREA_X, current_y), line, font=card["font"], fill="black")
+        current_y += card["line_height"] + LINE_SPACING
+
+def draw_footer(badge: Image.Image, card: dict):
+    """Server name and ID at the bottom right."""
+    width, height = card["footer_size"]
+    ImageDraw.Draw(badge).text((BADGE_SIZE[0] - width - MARGIN, BADGE_SIZE[1] - height - MARGIN),
+                               card["footer"], font=card["footer_font"], fill="black")
+
 def truncate(text: str, limit: int) -> str:
     """Truncate text to a maximum length."""
     if not text:
         return ""
     return text if len(text) <= limit else text[:limit]
 
-def get_truetype_font(font_source, size: int) -> ImageFont.FreeTypeFont:
-    """
-    Given a font_source which can be a path (str) or a BytesIO object,
-    resets the pointer if necessary and returns a truetype font.
-    """
-    if hasattr(font_source, "seek"):
-        font_source.seek(0)
-    return ImageFont.truetype(font_source, size)
-
-def get_text_size(draw: ImageDraw.Draw, text: str, font: ImageFont.FreeTypeFont) -> tuple:
-    """
-    Returns the width and height of the given text using the provided draw context and font,
-    using the textbbox method.
-    """
-    bbox = draw.textbbox((0, 0), text, font=font)
-    width = bbox[2] - bbox[0]
-    height = bbox[3] - bbox[1]
-    return width, height
-
 # --- The Cog with the /profile Command ---
 
 class Profile(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.fonts = FontCache(bot.http_client, FONT_CACHE_DIR, bundled=FONT_BUNDLED, max_bytes=FONT_CACHE_MAX_BYTES,
+                               max_font_bytes=FONT_MAX_BYTES, pool_size=FONT_POOL_SIZE)
+        self._ready = None
+        self.layout = TextLayout()
+        self.images = ImageCache(bot.http_client, IMAGE_CACHE_MAX_BYTES)
+        self.renders = RenderCache(RENDER_CACHE_MAX_BYTES, RENDER_CACHE_DIR, RENDER_CACHE_DISK_MAX_BYTES)
+        # Back to front; static layers and resources are built once in cog_load, the rest per badge
+        self.badge = CardTemplate(
+            BADGE_SIZE,
+            [
+                ImageLayer("background"),
+                StaticLayer("avatar border", (MARGIN, MARGIN), avatar_border),
+                ImageLayer("avatar", (MARGIN + BORDER_SIZE, MARGIN + BORDER_SIZE)),
+                DrawLayer(draw_text),
+                DrawLayer(draw_footer, when=lambda card: card["footer"]),
+                StaticLayer("QR code", (BADGE_SIZE[0] - QR_SIZE - MARGIN, MARGIN), site_qr_code,
+                            when=lambda card: card["guild_id"] == QR_GUILD_ID),
+            ],
+            resources={
+                "avatar mask": lambda: create_rounded_mask(AVATAR_SIZE, CORNER_RADIUS),
+                "fallback avatar": fallback_avatar,
+            },
+        )
+
+    async def cog_load(self):
+        # The default font may need downloading; don't hold up loading the other cogs for it
+        self.images.start()
+        self._ready = asyncio.create_task(self._start())
+        metrics.register("Text layout", self.layout.stats)
+        await self.renders.start()
+
+    async def _start(self):
+        await asyncio.gather(self.fonts.start(), self.badge.start())
+
+    async def cog_unload(self):
+        self._ready.cancel()
+        self.fonts.close()
+        metrics.unregister("Text layout")
+        self.images.close()
+        self.renders.close()
+
+    async def _banner(self, banner, size: tuple) -> tuple:
+        """
+        (the banner asset resized and blurred for the background, or None; False
+        if fetching it failed, so the badge shouldn't be cached).
+        """
+        if not banner:
+            return None, True
+        try:
+            return await self.images.get(banner.with_size(1024).url, ("banner",) + size,
+                                         lambda image: blur_banner(image, size)), True
+        except Exception as e:
+            print(f"Error with banner info: {e}")
+            return None, False
+
+    async def _avatar(self, asset) -> tuple:
+        """
+        (the avatar asset resized with rounded corners, or the fallback on a random
+        pastel background; False if the asset couldn't be fetched).
+        """
+        mask = self.badge.resource("avatar mask")
+        if asset:
+            try:
+                return await self.images.get(asset.with_size(512).url, ("avatar",) + AVATAR_SIZE,
+                                             lambda image: round_avatar(image, mask)), True
+            except Exception as e:
+                print(f"Error fetching avatar: {e}")
+        fallback = self.badge.resource("fallback avatar") or Image.new("RGBA", AVATAR_SIZE, (0, 0, 0, 0))
+        # Set a random pastel background for the fallback
+        pastel = (random.randint(200, 255), random.randint(200, 255), random.randint(200, 255))
+        # Only a stand-in when there was an avatar to fetch
+        return round_avatar(fallback, mask, pastel), not asset
+
+    async def _font(self, font_url: str):
+        """
+        Hash of the custom font if a URL is provided and usable; otherwise, the default.
+        (The URL should directly point to a .ttf file.) Both come from the font cache.
+        """
+        return await self.fonts.resolve(font_url) or self.fonts.default
+
+    async def _send_badge(self, interaction: discord.Interaction, data: bytes):
+        file = discord.File(fp=io.BytesIO(data), filename="profile.png")
+        await interaction.followup.send(file=file)
+        await log_action(self.bot, interaction)
 
     @app_commands.command(name="profile", description="Generate a custom ID badge profile")
     @app_commands.describe(
@@ -81,117 +191,6 @@ class Profile(commands.Cog):
         await interaction.response.defer()  # defer to allow time for image generation
         user = user or interaction.user
 
-        # -----------------------------------------------------------
-        # Settings and dimensions
-        badge_width, badge_height = 900, 450  # size of the ID badge
-        margin = 20
-        left_area_width = badge_width // 2
-        text_area_x = left_area_width + margin
-        line_spacing = 5
-
-        # Create base badge image (RGBA)
-        badge = Image.new("RGBA", (badge_width, badge_height))
-        
-        # -----------------------------------------------------------
-        # BACKGROUND: Use profile banner image if available, else banner color, else default.
-        try:
-            banner_img = None
-            banner_url = None
-            if hasattr(user, "banner") and user.banner:
-                banner_url = user.banner.url
-            if banner_url:
-                banner_img = await fetch_image(banner_url)
-                if banner_img:
-                    banner_img = banner_img.resize((badge_width, badge_height))
-                    banner_img = banner_img.filter(ImageFilter.GaussianBlur(radius=10))
-            if not banner_img:
-                # Use accent color if available; default to #fedc00 if not.
-                color = getattr(user, "accent_color", None) or "#fedc00"
-                banner_img = Image.new("RGBA", (badge_width, badge_height), color)
-        except Exception as e:
-            print(f"Error with banner info: {e}")
-            banner_img = Image.new("RGBA", (badge_width, badge_height), "#fedc00")
-        badge.paste(banner_img, (0, 0))
-
-        # -----------------------------------------------------------
-        # LEFT SIDE: User Avatar
-        avatar_img = None
-        try:
-            # In servers, use the display avatar (which may be a server-specific one)
-            if interaction.guild and hasattr(user, "display_avatar"):
-                avatar_url = user.display_avatar.url
-            else:
-                avatar_url = user.avatar.url if user.avatar else None
-
-            if avatar_url:
-                avatar_img = await fetch_image(avatar_url)
-            if not avatar_img:
-                avatar_img = await get_fallback_avatar()
-                # Set a random pastel background for the fallback
-                pastel = (random.randint(200, 255), random.randint(200, 255), random.randint(200, 255))
-                temp = Image.new("RGBA", avatar_img.size, pastel)
-                temp.paste(avatar_img, (0, 0), avatar_img)
-                avatar_img = temp
-        except Exception as e:
-            print(f"Error fetching avatar: {e}")
-            avatar_img = await get_fallback_avatar()
-
-        # If the avatar image has transparency, composite it on a white background.
-        if avatar_img.mode in ("RGBA", "LA"):
-            bg = Image.new("RGBA", avatar_img.size, (255, 255, 255, 255))
-            bg.paste(avatar_img, mask=avatar_img.split()[3])
-            avatar_img = bg
-
-        # Resize avatar to fit (with some margin) in left half.
-        target_avatar_width = left_area_width - 2 * margin
-        target_avatar_height = badge_height - 2 * margin
-        avatar_img = avatar_img.resize((target_avatar_width, target_avatar_height))
-
-        # Create rounded corners for the avatar.
-        corner_radius = 20
-        mask_img = create_rounded_mask(avatar_img.size, corner_radius)
-        avatar_img.putalpha(mask_img)
-
-        # Add a white border around the avatar.
-        border_size = 5
-        bordered_size = (avatar_img.width + 2 * border_size, avatar_img.height + 2 * border_size)
-        bordered_avatar = Image.new("RGBA", bordered_size, (0, 0, 0, 0))
-        # Draw white rounded rectangle as the border.
-        border_mask = create_rounded_mask(bordered_size, corner_radius + border_size)
-        border_draw = ImageDraw.Draw(bordered_avatar)
-        border_draw.rounded_rectangle((0, 0) + bordered_size, radius=corner_radius + border_size, fill="white")
-        bordered_avatar.paste(avatar_img, (border_size, border_size), avatar_img)
-
-        # Paste the avatar (with border) onto the left side.
-        badge.paste(bordered_avatar, (margin, margin), bordered_avatar)
-
-        # -----------------------------------------------------------
-        # TEXT INFO (Right Side)
-        draw = ImageDraw.Draw(badge)
-        current_y = margin
-
-        # Download custom font if a URL is provided; otherwise, use the default.
-        # (The URL should directly point to a .ttf file.)
-        font_source = None
-        if font_url:
-            try:
-                font_bytes = await download_bytes(font_url)
-                if font_bytes:
-                    font_source = font_bytes
-            except Exception as e:
-                print(f"Error downloading custom font: {e}")
-        # Use default font file if custom font not available.
-        if not font_source:
-            default_font_url = "https://raw.githubusercontent.com/dolbydu/font/master/unicode/Microsoft%20Yahei.ttf"
-            try:
-                font_bytes = await download_bytes(default_font_url)
-                if font_bytes:
-                    font_source = font_bytes
-            except Exception as e:
-                print(f"Error downloading default font: {e}")
-                # Fallback to local file if available
-                font_source = "MicrosoftYaHei.ttf"
-
         # Prepare user info text with truncation
         username = truncate(user.name, 16)
         display_name = truncate(user.display_name, 16)
@@ -211,7 +210,7 @@ class Profile(commands.Cog):
         bio = ""
         try:
             if hasattr(user, "bio") and user.bio:
-                bio = truncate(user.bio, 128)
+                bio = user.bio
         except Exception as e:
             print(f"Error accessing bio: {e}")
         
@@ -230,58 +229,92 @@ class Profile(commands.Cog):
             text_lines.append(f"Server member since: {server_join}")
         if activity:
             text_lines.append(activity)
-        if bio:
-            text_lines.append(f"Bio: {bio}")
-
-        # Determine a font size that allows each line to fit in the available width.
-        max_font_size = 40
-        text_area_width = badge_width - text_area_x - margin
-
-        # Start with the maximum font size and decrement until all text fits.
-        while True:
-            font = get_truetype_font(font_source, max_font_size)
-            all_fit = True
-            for line in text_lines:
-                w, h = get_text_size(draw, line, font)
-                if w > text_area_width:
-                    all_fit = False
-                    break
-            if all_fit or max_font_size <= 10:
-                break
-            max_font_size -= 1
-
-        # Draw each text line with at least 2px spacing.
-        current_y = margin
-        for line in text_lines:
-            w, h = get_text_size(draw, line, font)
-            draw.text((text_area_x, current_y), line, font=font, fill="black")
-            current_y += h + line_spacing
-
-        # Draw footer (server name and ID) at bottom right if in a guild.
-        if interaction.guild and server_info:
-            footer_font = get_truetype_font(font_source, 14)
-            fw, fh = get_text_size(draw, server_info, footer_font)
-            draw.text((badge_width - fw - margin, badge_height - fh - margin), server_info, font=footer_font, fill="black")
+
+        # In servers, use the display avatar (which may be a server-specific one)
+        if interaction.guild and hasattr(user, "display_avatar"):
+            avatar_asset = user.display_avatar
+        else:
+            avatar_asset = user.avatar
+        banner_asset = getattr(user, "banner", None)
 
         # -----------------------------------------------------------
-        # QR CODE: If executed in the server with a specific ID, add a small QR at the top right.
-        if interaction.guild and interaction.guild.id == 576590416296542249:
+        # OUTPUT CACHE: a badge whose inputs all match an earlier one is re-sent without rendering.
+        def badge_key(font_key):
+            return fingerprint(
+                BADGE_VERSION, text_lines, bio, server_info, interaction.guild and interaction.guild.id,
+                avatar_asset and asset_key(avatar_asset.url), banner_asset and asset_key(banner_asset.url),
+                getattr(user, "accent_color", None), font_key,
+            )
+
+        await asyncio.shield(self._ready)
+        font_key = self.fonts.cached(font_url)
+        if font_key is not None:
+            data = await self.renders.get(badge_key(font_key))
+            if data is not None:
+                await self._send_badge(interaction, data)
+                return
+
+        # Banner, avatar and font are fetched concurrently; each comes from a cache when warm.
+        (banner_img, banner_ok), (avatar_img, avatar_ok), font_key = await asyncio.gather(
+            self._banner(banner_asset, BADGE_SIZE),
+            self._avatar(avatar_asset),
+            self._font(font_url),
+        )
+
+        # -----------------------------------------------------------
+        # BACKGROUND: Use profile banner image if available, else banner color, else default.
+        if not banner_img:
             try:
-                qr = qrcode.make("https://globalfurry.tv/")
-                qr_size = 80
-                qr = qr.resize((qr_size, qr_size))
-                badge.paste(qr, (badge_width - qr_size - margin, margin))
+                # Use accent color if available; default to #fedc00 if not.
+                color = getattr(user, "accent_color", None) or "#fedc00"
+                banner_img = Image.new("RGBA", BADGE_SIZE, color)
             except Exception as e:
-                print(f"Error generating QR code: {e}")
+                print(f"Error with banner info: {e}")
+                banner_img = Image.new("RGBA", BADGE_SIZE, "#fedc00")
+
+        # -----------------------------------------------------------
+        # TEXT INFO (Right Side)
+        # Pick the largest font size (10-40) at which every line fits the text area, leaving
+        # room below for the footer and at least one line of bio.
+        text_area_bottom = BADGE_SIZE[1] - MARGIN
+        footer_font = self.fonts.font(font_key, 14)
+        footer_size = (self.layout.width(font_key, footer_font, server_info), self.layout.line_height(font_key, footer_font))
+        if server_info:
+            text_area_bottom -= footer_size[1] + LINE_SPACING
+        font = self.layout.fit(font_key, lambda size: self.fonts.font(font_key, size), text_lines,
+                               TEXT_AREA_WIDTH, text_area_bottom - MARGIN, LINE_SPACING, reserve_lines=1 if bio else 0)
+        line_height = self.layout.line_height(font_key, font)
+
+        # The bio wraps over whatever height is left, ending in an ellipsis if it doesn't fit.
+        bio_lines = []
+        if bio:
+            rows_left = (text_area_bottom - MARGIN) // (line_height + LINE_SPACING) - len(text_lines)
+            bio_lines = self.layout.wrap(font_key, font, f"Bio: {bio}", TEXT_AREA_WIDTH, max_lines=rows_left)
 
         # -----------------------------------------------------------
-        # Save the final badge image to a BytesIO buffer and send as a PNG file.
+        # Composite the per-badge layers over the prebuilt static ones.
+        badge = self.badge.render({
+            "background": banner_img,
+            "avatar": avatar_img,
+            "lines": text_lines + bio_lines,
+            "font": font,
+            "line_height": line_height,
+            "footer": server_info,
+            "footer_font": footer_font,
+            "footer_size": footer_size,
+            "guild_id": interaction.guild and interaction.guild.id,
+        })
+
+        # -----------------------------------------------------------
+        # Encode the final badge as PNG, keep it for identical requests and send it.
+        # A badge drawn with a stand-in for a banner or avatar that failed to load is
+        # not kept, or the stand-in would be served under the real asset's key.
         buffer = io.BytesIO()
         badge.save(buffer, format="PNG")
-        buffer.seek(0)
-        file = discord.File(fp=buffer, filename="profile.png")
-        await interaction.followup.send(file=file)
-        await log_action(self.bot, interaction)
+        data = buffer.getvalue()
+        if banner_ok and avatar_ok:
+            await self.renders.put(badge_key(font_key), data)
+        await self._send_badge(interaction, data)
 
 async def setup(bot):
     await bot.add_cog(Profile(bot))
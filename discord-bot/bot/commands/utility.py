@@ -22,7 +22,6 @@ import asyncio
 import subprocess
 import shlex
 import os
-import requests
 from urllib.parse import urljoin, urlparse
 from core.logger import log_action
 from config import BOT_OWNER_ID
@@ -58,6 +57,10 @@ top20_language_codes = {
 
 top20_languages = list(top20_language_codes.keys())
 
+# Scraper requests go through the shared HTTP client with their own limits
+SCRAPE_TIMEOUT = aiohttp.ClientTimeout(total=10)
+SCRAPE_MAX_BYTES = 100 * 1024 * 1024
+
 # --------------------------
 # Country Checklist Handlers
 # --------------------------
@@ -213,8 +216,6 @@ class TranslateView(discord.ui.View):
 class Utility(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        # Kick off an initial load
-        self._load_task = bot.loop.create_task(self._load_countries())
         self.valid_users = [269080651599314944, 292864211825197056, 543846099971080192]
 
         # These sets help avoid downloading the same page or resource more than once.
@@ -375,53 +376,30 @@ class Utility(commands.Cog):
     # -------------------------
     # Country Checklist Handler
     # -------------------------
-    async def _load_countries(self):
-        """Fetch from restcountries.com and map continents to country lists, handling errors."""
-        url = "https://restcountries.com/v3.1/all"
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as resp:
-                    if resp.status != 200:
-                        raise ValueError(f"Bad status: {resp.status}")
-                    data = await resp.json(content_type=None)
-        except Exception as e:
-            logger.error(f"Failed to load country data: {e}")
-            self.continents = {}
-            return
-
-        continents = {}
-        for entry in data:
-            name = entry.get("name", {}).get("common")
-            conts = entry.get("continents")
-            if name and conts:
-                continents.setdefault(conts[0], []).append(name)
-        for c in continents:
-            continents[c].sort()
-        self.continents = continents
-        logger.info(f"Loaded {sum(len(v) for v in continents.values())} countries across {len(continents)} continents.")
-
     @app_commands.command(
         name="countrychecklist",
         description="Mark which countries you've been to, by continent."
     )
     async def countrychecklist(self, interaction: discord.Interaction):
         # Wait for the initial load; retry on failure
-        await self._load_task
-        if not getattr(self, 'continents', None):
-            await self._load_countries()
+        countries = self.bot.countries
+        await countries.wait_ready()
+        if not countries.continents:
+            await countries.refresh()
+        continents = countries.continents
 
         # Build the embed
         embed = discord.Embed(
             title="Which countries have I been to?",
             color=discord.Color.blurple()
         )
-        if not self.continents:
+        if not continents:
             embed.description = "⚠️ Country data unavailable. Please try again later."
         else:
-            for cont in self.continents:
+            for cont in continents:
                 embed.add_field(name=cont, value="None", inline=True)
 
-        view = CountryChecklistView(self.continents, interaction.user)
+        view = CountryChecklistView(continents, interaction.user)
         await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
         view.init_message = await interaction.original_response()
         await log_action(self.bot, interaction)
@@ -531,21 +509,32 @@ class Utility(commands.Cog):
     # ----- Scrape Handler ----
     # -------------------------
     def get_local_path(self, url: str, base_output_dir: str) -> str:
-        parsed = requests.utils.urlparse(url)
+        parsed = urlparse(url)
         path = parsed.path or "/"
         if path.endswith("/"):
             path = os.path.join(path, "index.html")
         return os.path.join(base_output_dir, parsed.netloc, path.lstrip("/"))
 
+    async def _fetch(self, url: str) -> Tuple[str, bytes]:
+        """Fetch a URL through the shared HTTP client, returning (content type, body)."""
+        http = self.bot.http_client
+        async with http.request("GET", url, timeout=SCRAPE_TIMEOUT) as resp:
+            resp.raise_for_status()
+            return resp.headers.get("Content-Type", ""), await http.read(resp, SCRAPE_MAX_BYTES)
+
+    def fetch_sync(self, url: str) -> Tuple[str, bytes]:
+        """Blocking wrapper around `_fetch` for the scraper's worker thread."""
+        return asyncio.run_coroutine_threadsafe(self._fetch(url), self.bot.loop).result()
+
+    def save_file(self, body: bytes, local_path: str):
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        with open(local_path, "wb") as f:
+            f.write(body)
+
     def download_file(self, url: str, local_path: str) -> bool:
         try:
-            response = requests.get(url, stream=True, timeout=10)
-            response.raise_for_status()
-            os.makedirs(os.path.dirname(local_path), exist_ok=True)
-            with open(local_path, "wb") as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
+            _, body = self.fetch_sync(url)
+            self.save_file(body, local_path)
             return True
         except Exception as e:
             print(f"Error downloading {url}: {e}")
@@ -556,21 +545,20 @@ class Utility(commands.Cog):
             return
         self.visited_pages.add(url)
         try:
-            resp = requests.get(url, timeout=10)
-            resp.raise_for_status()
+            content_type, body = self.fetch_sync(url)
         except Exception as e:
             print(f"Error accessing {url}: {e}")
             return
-        if "text/html" not in resp.headers.get("Content-Type", ""):
-            self.download_file(url, self.get_local_path(url, base_output_dir))
+        if "text/html" not in content_type:
+            self.save_file(body, self.get_local_path(url, base_output_dir))
             return
-        soup = BeautifulSoup(resp.text, "lxml")
+        soup = BeautifulSoup(body, "lxml")
 
         def process_resource(tag, attr):
             if not tag.has_attr(attr):
                 return
             orig = tag[attr]
-            resource_url = requests.compat.urljoin(url, orig)
+            resource_url = urljoin(url, orig)
             local_res = self.get_local_path(resource_url, base_output_dir)
             if resource_url not in self.downloaded_resources:
                 if self.download_file(resource_url, local_res):
@@ -591,8 +579,8 @@ class Utility(commands.Cog):
             f.write(str(soup))
 
         for a in soup.find_all("a", href=True):
-            next_url = requests.compat.urljoin(url, a["href"])
-            if requests.utils.urlparse(next_url).netloc == base_domain:
+            next_url = urljoin(url, a["href"])
+            if urlparse(next_url).netloc == base_domain:
                 self.scrape_page(next_url, base_output_dir, base_domain)
 
     def upload_with_npm_cli(self, file_path: str) -> str:
@@ -611,7 +599,7 @@ class Utility(commands.Cog):
         self.visited_pages.clear()
         self.downloaded_resources.clear()
         os.makedirs(base_output_dir, exist_ok=True)
-        self.scrape_page(url, base_output_dir, requests.utils.urlparse(url).netloc)
+        self.scrape_page(url, base_output_dir, urlparse(url).netloc)
         return shutil.make_archive(base_output_dir, 'zip', base_output_dir)
 
     @app_commands.command(name="scrape",
@@ -2,17 +2,31 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import asyncio
-import yt_dlp
-import os
-import csv
-import random
-import string
+import time
 from datetime import datetime
+from urllib.parse import urlparse, parse_qs
 from core.logger import log_action
+from bot.services.queues import QueueEngine, TrackIdAllocator
+from bot.services.extractor import ExtractionService
+from bot.services.resolver import TrackResolver
+from bot.services.prefetch import NextTrackPrefetcher
+from bot.services.history import PlaybackHistory
+from bot.services.audio import AudioSourceFactory
+from bot.services.audio_cache import AudioCache
+from config import (
+    QUEUE_JOURNAL_COMPACT_EVERY, EXTRACT_WORKERS, EXTRACT_TIMEOUT, VOICE_PREOPEN_SECONDS,
+    PLAYLIST_MAX_TRACKS, PLAYLIST_PROGRESS_INTERVAL, HISTORY_SIZE, HISTORY_PERSIST,
+    VOICE_BITRATE, VOICE_INPUT_BUFFER, AUDIO_CACHE_DIR, AUDIO_CACHE_MAX_BYTES,
+)
 
 COOKIES_FILE = "cookies.txt"  # Path to the YouTube cookies file
-QUEUE_FILE = "queue.csv"
-FIELDNAMES = ['id','track_id','song_link','title','artist','requestor_userid','datetime_now']
+
+def is_playlist_url(url: str) -> bool:
+    """YouTube playlists/mixes (list=...), and the usual playlist/album/set paths elsewhere."""
+    parsed = urlparse(url)
+    if "list" in parse_qs(parsed.query):
+        return True
+    return any(part in parsed.path for part in ("/playlist", "/sets/", "/album/"))
 
 # View for player controls during playback
 class PlayerControls(discord.ui.View):
@@ -53,13 +67,14 @@ class PlayerControls(discord.ui.View):
         button.style = discord.ButtonStyle.success if state else discord.ButtonStyle.danger
         await interaction.response.edit_message(view=self)
 
-# View for queue pagination
+# View for queue pagination; pages are rendered on first view and kept
 class QueueView(discord.ui.View):
-    def __init__(self, pages):
+    def __init__(self, total, render, first_page=None):
         super().__init__(timeout=60)
-        self.pages = pages
+        self.render = render  # coroutine: page index -> embed
+        self.pages = {0: first_page} if first_page else {}
         self.current = 0
-        self.total = len(pages)
+        self.total = total
         # disable prev on first page
         self.prev.disabled = True
         # set page label
@@ -73,7 +88,7 @@ class QueueView(discord.ui.View):
         self.prev.disabled = (self.current == 0)
         self.next.disabled = False
         self.page.label = f"{self.current+1}/{self.total}"
-        await interaction.response.edit_message(embed=self.pages[self.current], view=self)
+        await interaction.response.edit_message(embed=await self._page(self.current), view=self)
 
     @discord.ui.button(label="1/1", style=discord.ButtonStyle.secondary, disabled=True, custom_id="queue_page")
     async def page(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -85,40 +100,75 @@ class QueueView(discord.ui.View):
         self.prev.disabled = False
         self.next.disabled = (self.current == self.total - 1)
         self.page.label = f"{self.current+1}/{self.total}"
-        await interaction.response.edit_message(embed=self.pages[self.current], view=self)
+        await interaction.response.edit_message(embed=await self._page(self.current), view=self)
+
+    async def _page(self, index):
+        if index not in self.pages:
+            self.pages[index] = await self.render(index)
+        return self.pages[index]
 
 class Voice(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.voice_clients = {}
         self.looping = {}  # Dictionary to track looping state per guild
-        self.history = {}
-        # ensure queue file exists with header
-        if not os.path.exists(QUEUE_FILE):
-            with open(QUEUE_FILE, 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(FIELDNAMES)
+        self.history = PlaybackHistory(HISTORY_SIZE, bot.storage if HISTORY_PERSIST else None)
+        self.queues = QueueEngine(bot.storage, compact_every=QUEUE_JOURNAL_COMPACT_EVERY)
+        self.track_ids = TrackIdAllocator(bot.session_number)
+        self.extractor = ExtractionService(workers=EXTRACT_WORKERS, timeout=EXTRACT_TIMEOUT, cookies_file=COOKIES_FILE)
+        # Metadata and stream URLs are cached so replays, restarts and loops skip extraction
+        self.resolver = TrackResolver(self.extractor, bot.http_client, bot.storage)
+        self.audio = AudioSourceFactory(bitrate=VOICE_BITRATE, input_buffer=VOICE_INPUT_BUFFER)
+        # Popular tracks replay from disk without extraction or streaming
+        self.audio_cache = AudioCache(AUDIO_CACHE_DIR, AUDIO_CACHE_MAX_BYTES) if AUDIO_CACHE_DIR else None
+        # Resolves (and near the end, opens) the next queued track while the current one plays
+        self.prefetcher = NextTrackPrefetcher(self.queues, self.resolver, self._open_source,
+                                              preopen_lead=VOICE_PREOPEN_SECONDS, audio_cache=self.audio_cache)
+
+    async def cog_load(self):
+        await self.queues.start()
+        await self.history.start()
+        self.extractor.start()
+        await self.resolver.start()
+        self.audio.start()
+        if self.audio_cache:
+            await asyncio.to_thread(self.audio_cache.start)
+        self.prefetcher.start()
+
+    async def cog_unload(self):
+        self.prefetcher.close()
+        await self.queues.close()
+        self.resolver.close()
+        self.audio.close()
+        if self.audio_cache:
+            self.audio_cache.close()
+        self.extractor.close()
 
     def generate_track_id(self):
-        existing = set()
-        with open(QUEUE_FILE, newline='') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                existing.add(row['track_id'])
-        while True:
-            tid = ''.join(random.choices(string.ascii_lowercase + string.digits, k=8))
-            if tid not in existing:
-                return tid
-
-    def add_to_queue(self, track):
+        return self.track_ids.next()
+
+    async def add_to_queue(self, guild_id, track):
         """
-        Append a track dict to the CSV, aligned with fixed FIELDNAMES.
+        Append a track dict to the guild's queue.
         """
-        # Ensure all fields present (id left blank)
-        row = { key: track.get(key, '') for key in FIELDNAMES }
-        with open(QUEUE_FILE, 'a', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
-            writer.writerow(row)
+        await self.queues.enqueue(guild_id, track)
+        self.prefetcher.schedule(guild_id)
+
+    async def _open_source(self, track):
+        url = track['song_link']
+        if "cdn.discordapp.com" in url:
+            return await self.audio.create(url)
+        if self.audio_cache:
+            cached = self.audio_cache.open(url)
+            if cached:
+                return cached
+        source_url, codec = await self.resolver.stream(url)
+        source = await self.audio.create(source_url, codec)
+        # Live streams have no duration and are never cached
+        duration = self.resolver.cached_metadata(url).get('duration')
+        if self.audio_cache and duration:
+            source = self.audio_cache.record(url, source, duration)
+        return source
 
     @app_commands.command(name="join", description="Join the voice channel you are currently in.")
     async def join(self, interaction: discord.Interaction):
@@ -173,6 +223,7 @@ class Voice(commands.Cog):
 
         if voice_client and voice_client.is_connected():
             await voice_client.disconnect()
+            self.prefetcher.discard(interaction.guild.id)
             await interaction.response.send_message("✅ Left the voice channel.")
         else:
             await interaction.response.send_message("❌ I am not in any voice channel!", ephemeral=True)
@@ -190,6 +241,12 @@ class Voice(commands.Cog):
         if not vc:
             vc = await channel.connect(timeout=20, reconnect=True)
 
+        # Playlists are streamed into the queue in batches
+        if is_playlist_url(url):
+            await self._enqueue_playlist(interaction, url, vc)
+            await log_action(self.bot, interaction)
+            return
+
         # If already playing, enqueue immediately without deferring
         if vc.is_playing():
             # Minimal metadata; full info will display when played
@@ -201,7 +258,7 @@ class Voice(commands.Cog):
                 'requestor_userid': str(interaction.user.id),
                 'datetime_now': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             }
-            self.add_to_queue(track)
+            await self.add_to_queue(interaction.guild.id, track)
             await interaction.response.send_message(
                 f"✅ Added to queue: **{track['title']}** (ID: {track['track_id']})",
                 ephemeral=True
@@ -212,19 +269,16 @@ class Voice(commands.Cog):
         await interaction.response.defer()
         song_title = "Unknown Title"
         artist = "Unknown"
-        audio_url = url
         try:
             if "cdn.discordapp.com" in url:
-                source = discord.FFmpegPCMAudio(url, options="-vn -b:a 192k")
                 song_title = "Audio File"
             else:
-                ydl_opts = {'format':'bestaudio/best', 'quiet':True, 'cookies': COOKIES_FILE if os.path.exists(COOKIES_FILE) else None}
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    info = ydl.extract_info(url, download=False)
-                    audio_url = info['url']
-                    song_title = info.get('title', song_title)
-                    artist = info.get('uploader', artist)
-                    source = discord.FFmpegPCMAudio(audio_url, options="-vn -b:a 192k")
+                metadata = await self.resolver.metadata(url)
+                song_title = metadata.get('title') or song_title
+                artist = metadata.get('uploader') or artist
+        except asyncio.TimeoutError:
+            await interaction.followup.send("⌛ Timed out while extracting audio.", ephemeral=True)
+            return
         except Exception as e:
             await interaction.followup.send(f"❌ Failed to extract audio: {e}", ephemeral=True)
             return
@@ -241,10 +295,65 @@ class Voice(commands.Cog):
         await self.play_track(track, interaction)
         await log_action(self.bot, interaction)
 
+    async def _enqueue_playlist(self, interaction: discord.Interaction, url: str, vc):
+        """
+        Flat-extract a playlist and add its entries to the queue batch by batch as
+        they are discovered. Tracks are only resolved when the prefetcher or
+        playback reaches them. Starts playback after the first batch if idle.
+        """
+        await interaction.response.defer()
+        guild_id = interaction.guild.id
+        progress = await interaction.followup.send("📥 Reading playlist…", wait=True)
+        added, title, last_edit = 0, None, time.monotonic()
+        try:
+            async for title, entries in self.extractor.playlist(url, limit=PLAYLIST_MAX_TRACKS):
+                now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                tracks = []
+                for entry in entries:
+                    link = entry.get('webpage_url') or entry.get('url')
+                    if not link:
+                        continue
+                    if entry.get('ie_key') == 'Youtube' and not link.startswith('http'):
+                        link = f"https://www.youtube.com/watch?v={link}"
+                    tracks.append({
+                        'track_id': self.generate_track_id(),
+                        'song_link': link,
+                        'title': entry.get('title') or link,
+                        'artist': entry.get('uploader') or entry.get('channel') or 'Unknown',
+                        'requestor_userid': str(interaction.user.id),
+                        'datetime_now': now,
+                    })
+                if not tracks:
+                    continue
+                await self.queues.enqueue_many(guild_id, tracks)
+                added += len(tracks)
+                self.prefetcher.schedule(guild_id)
+
+                if not vc.is_playing() and not vc.is_paused():
+                    first = await self.queues.pop(guild_id)
+                    if first is not None:
+                        try:
+                            await self.play_track(first, interaction)
+                        except Exception as e:
+                            await interaction.followup.send(f"❌ Failed to play **{first['title']}**: {e}", ephemeral=True)
+
+                if time.monotonic() - last_edit >= PLAYLIST_PROGRESS_INTERVAL:
+                    last_edit = time.monotonic()
+                    await progress.edit(content=f"📥 Reading **{title or 'playlist'}**… {added} track(s) queued")
+        except asyncio.TimeoutError:
+            await progress.edit(content=f"⌛ Timed out reading the playlist after {added} track(s).")
+            return
+        except Exception as e:
+            await progress.edit(content=f"❌ Failed to read the playlist after {added} track(s): {e}")
+            return
+
+        capped = " (limit reached)" if added >= PLAYLIST_MAX_TRACKS else ""
+        await progress.edit(content=f"✅ Added {added} track(s) from **{title or 'playlist'}**{capped}.")
+
     async def play_track(self, track, interaction):
         guild_id = interaction.guild.id
         # track history
-        self.history.setdefault(guild_id, []).append(track)
+        await self.history.record(guild_id, track)
 
         # get or reconnect voice client
         vc = discord.utils.get(self.bot.voice_clients, guild=interaction.guild)
@@ -258,17 +367,15 @@ class Voice(commands.Cog):
                 await interaction.followup.send("❌ Unable to join voice channel.", ephemeral=True)
                 return
 
-        # prepare source
-        source = None
-        url = track['song_link']
-        if "cdn.discordapp.com" in url:
-            source = discord.FFmpegPCMAudio(url, options="-vn -b:a 192k")
-        else:
-            ydl_opts = {'format':'bestaudio/best', 'quiet':True}
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=False)
-                source_url = info.get('url')
-                source = discord.FFmpegPCMAudio(source_url, options="-vn -b:a 192k")
+        # prepare source, using the one opened ahead of time if there is one
+        try:
+            source = self.prefetcher.take(guild_id, track) or await self._open_source(track)
+        except Exception as e:
+            # e.g. no stream URL, or a lazily queued playlist entry that is now private or deleted
+            await interaction.followup.send(f"❌ Skipping **{track['title']}**: {str(e) or 'timed out'}", ephemeral=True)
+            if not self.looping.get(guild_id, False):
+                await self._play_next(interaction)
+            return
 
         def after_play(error):
             if error:
@@ -278,11 +385,13 @@ class Voice(commands.Cog):
                 return
             
             # only schedule auto-next when the track really finishes
+            self.prefetcher.track_ended(guild_id)
             coro = self._play_next(interaction)
             asyncio.run_coroutine_threadsafe(coro, self.bot.loop)
 
         # play audio
         vc.play(source, after=after_play)
+        self.prefetcher.track_started(guild_id, self.resolver.cached_metadata(track['song_link']).get('duration'))
 
         # send now playing embed
         embed = discord.Embed(title="Now Playing", description=f"**{track['title']}** by *{track['artist']}*")
@@ -297,93 +406,81 @@ class Voice(commands.Cog):
         guild_id = interaction.guild.id
         # handle looping option
         if self.looping.get(guild_id, False):
-            last = self.history.get(guild_id, [])[-1]
-            return await self.play_track(last, interaction)
-
-        # read queue file
-        with open(QUEUE_FILE, newline='') as f:
-            rows = list(csv.DictReader(f))
+            last = self.history.current(guild_id)
+            return await self.play_track(last.as_track(), interaction)
 
-        if not rows:
+        # pop the next track off this guild's queue
+        next_track = await self.queues.pop(guild_id)
+        if next_track is None:
             await interaction.channel.send("✅ Queue is empty.")
             return
 
-        # pop the next track and rewrite queue without it
-        next_track = rows.pop(0)
-        with open(QUEUE_FILE, 'w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
-            writer.writeheader()
-            writer.writerows(rows)
-
         # play the next track
         await self.play_track(next_track, interaction)
 
     async def _play_previous(self, interaction):
-        hist = self.history.get(interaction.guild.id, [])
-        if len(hist) < 2:
+        prev_track = self.history.previous(interaction.guild.id)
+        if prev_track is None:
             await interaction.response.send_message("❌ No previous track.", ephemeral=True)
             return
-        prev_track = hist[-2]
-        await self.play_track(prev_track, interaction)
+        await self.play_track(prev_track.as_track(), interaction)
 
     async def _send_queue_pages(self, interaction: discord.Interaction):
         """
-        Helper to load queue.csv, build paginated embeds, and send a /queue show response.
+        Helper to send a paginated /queue show response. Pages are rendered only
+        when viewed, from a snapshot of the queue taken now.
         """
-        # Load queue rows
-        with open(QUEUE_FILE, newline='') as f:
-            rows = list(csv.DictReader(f))
+        # Snapshot queue rows
+        rows = self.queues.tracks(interaction.guild.id)
 
         # Empty queue
         if not rows:
             await interaction.response.send_message("✅ Queue is empty.")
             return
 
-        # Build embed pages
-        pages = []
         per_page = 5
-        for i in range(0, len(rows), per_page):
+        total = (len(rows) + per_page - 1) // per_page
+
+        async def render(page):
+            start = page * per_page
+            page_rows = rows[start:start+per_page]
+            # Resolve this page's requesters in one go
+            requesters = await self.bot.user_names.resolve(
+                interaction.guild, {int(row['requestor_userid']) for row in page_rows}
+            )
             embed = discord.Embed(title="Current Queue")
-            for idx, row in enumerate(rows[i:i+per_page], start=i+1):
-                # Resolve requestor display name
-                member = interaction.guild.get_member(int(row['requestor_userid']))
-                if member:
-                    requester = member.display_name
-                else:
-                    user = await self.bot.fetch_user(int(row['requestor_userid']))
-                    requester = user.name
-
+            for idx, row in enumerate(page_rows, start=start+1):
                 embed.add_field(
-                    name=f"{idx}. {row['title']}",
+                    name=f"{idx}. {row['title']}"[:256],
                     value=(
                         f"Artist: {row['artist']}\n"
-                        f"Requested by {requester}\n"
+                        f"Requested by {requesters[int(row['requestor_userid'])]}\n"
                         f"ID: `{row['track_id']}`"
                     ),
                     inline=False
                 )
-            pages.append(embed)
+            return embed
 
-        # Send first page (with pagination if needed)
-        if len(pages) == 1:
-            await interaction.response.send_message(embed=pages[0])
+        # Only the first page is rendered before replying
+        await interaction.response.defer()
+        first = await render(0)
+        if total == 1:
+            await interaction.followup.send(embed=first)
         else:
-            view = QueueView(pages)
-            await interaction.response.send_message(embed=pages[0], view=view)
+            await interaction.followup.send(embed=first, view=QueueView(total, render, first))
     
     async def _restart_current(self, interaction: discord.Interaction):
         """Stop and replay the currently playing track from the beginning."""
         guild_id = interaction.guild.id
         vc = discord.utils.get(self.bot.voice_clients, guild=interaction.guild)
         # Get last-played track from history
-        history = self.history.get(guild_id, [])
-        if not history or not vc:
+        current = self.history.current(guild_id)
+        if current is None or not vc:
             await interaction.followup.send("❌ No track is currently playing.", ephemeral=True)
             return
-        current = history[-1]
         # Stop current playback and restart
         vc.stop()
-        await self.play_track(current, interaction)
+        await self.play_track(current.as_track(), interaction)
 
     @app_commands.command(name="playing", description="Show info about the currently playing track.")
     async def playing(self, interaction: discord.Interaction):
@@ -399,21 +496,16 @@ class Voice(commands.Cog):
 
         # Get the last track from history
         guild_id = interaction.guild.id
-        history = self.history.get(guild_id, [])
-        if not history:
+        current = self.history.current(guild_id)
+        if current is None:
             await interaction.response.send_message("❌ Nothing is playing right now.", ephemeral=True)
             return
-        current = history[-1]
+        current = current.as_track()
 
         # Resolve requester name
         try:
-            member = interaction.guild.get_member(int(current['requestor_userid']))
-            if member:
-                requester = member.display_name
-            else:
-                user = await self.bot.fetch_user(int(current['requestor_userid']))
-                requester = user.name
-        except Exception:
+            requester = await self.bot.user_names.name(interaction.guild, int(current['requestor_userid']))
+        except ValueError:
             requester = "Unknown"
 
         # Build and send embed
@@ -425,6 +517,33 @@ class Voice(commands.Cog):
         embed.set_footer(text=f"Requested by {requester} • {current['datetime_now']}")
         await interaction.response.send_message(embed=embed)
 
+    @app_commands.command(name="history", description="Show recently played tracks.")
+    async def history_show(self, interaction: discord.Interaction):
+        """Lists this server's recently played tracks, newest first."""
+        entries = self.history.entries(interaction.guild.id)
+        if not entries:
+            await interaction.response.send_message("❌ Nothing has been played yet.", ephemeral=True)
+            return
+
+        # Build embed pages
+        pages = []
+        per_page = 10
+        for i in range(0, len(entries), per_page):
+            lines = [
+                f"**{idx}.** [{entry.title}]({entry.song_link}) by *{entry.artist}*\n"
+                f"Requested by <@{entry.requestor_userid}> • {entry.datetime_now}"
+                for idx, entry in enumerate(entries[i:i+per_page], start=i+1)
+            ]
+            pages.append(discord.Embed(title="Recently Played", description="\n".join(lines)[:4096]))
+
+        if len(pages) == 1:
+            await interaction.response.send_message(embed=pages[0])
+        else:
+            async def render(page):
+                return pages[page]
+            await interaction.response.send_message(embed=pages[0], view=QueueView(len(pages), render, pages[0]))
+        await log_action(self.bot, interaction)
+
     @app_commands.command(name="skip", description="Skip to the next track in the queue.")
     async def skip(self, interaction: discord.Interaction):
         """Stops current playback and plays the next queued track."""
@@ -444,46 +563,37 @@ class Voice(commands.Cog):
 
     @queue.command(name="clear", description="Clear the entire queue.")
     async def queue_clear(self, interaction: discord.Interaction):
-        # reset queue file with only header
-        with open(QUEUE_FILE, 'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(['id','track_id','song_link','title','artist','requestor_userid','datetime_now'])
+        await self.queues.clear(interaction.guild.id)
+        self.prefetcher.schedule(interaction.guild.id)
         await interaction.response.send_message("✅ Queue cleared.")
         await log_action(self.bot, interaction)
 
     @queue.command(name="remove", description="Remove a specific track from the queue.")
     @app_commands.describe(track_id="The ID of the track to remove.")
     async def queue_remove(self, interaction: discord.Interaction, track_id: str):
-        with open(QUEUE_FILE, newline='') as f:
-            rows = list(csv.DictReader(f))
-        filtered = [r for r in rows if r['track_id'] != track_id]
-        if len(filtered) == len(rows):
+        if not await self.queues.remove(interaction.guild.id, track_id):
             await interaction.response.send_message(f"❌ No track with ID `{track_id}` found.", ephemeral=True)
             return
-        with open(QUEUE_FILE, 'w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=rows[0].keys())
-            writer.writeheader()
-            writer.writerows(filtered)
+        self.prefetcher.schedule(interaction.guild.id)
         await interaction.response.send_message(f"✅ Removed track `{track_id}` from the queue.")
         await log_action(self.bot, interaction)
 
+    @queue_remove.autocomplete("track_id")
+    async def _queued_track_autocomplete(self, interaction: discord.Interaction, current: str):
+        choices = []
+        for track in self.queues.complete(interaction.guild.id, current.strip().lower()):
+            name = f"{track['track_id']} · {track['title']}"
+            choices.append(app_commands.Choice(name=name[:100], value=track['track_id']))
+        return choices
+
     @queue.command(name="bump", description="Move a specific track to the top of the queue.")
     @app_commands.describe(track_id="The ID of the track to bump.")
+    @app_commands.autocomplete(track_id=_queued_track_autocomplete)
     async def queue_bump(self, interaction: discord.Interaction, track_id: str):
-        with open(QUEUE_FILE, newline='') as f:
-            rows = list(csv.DictReader(f))
-        for idx, r in enumerate(rows):
-            if r['track_id'] == track_id:
-                track = rows.pop(idx)
-                rows.insert(0, track)
-                break
-        else:
+        if not await self.queues.bump(interaction.guild.id, track_id):
             await interaction.response.send_message(f"❌ No track with ID `{track_id}` found.", ephemeral=True)
             return
-        with open(QUEUE_FILE, 'w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=rows[0].keys())
-            writer.writeheader()
-            writer.writerows(rows)
+        self.prefetcher.schedule(interaction.guild.id)
         await interaction.response.send_message(f"✅ Bumped track `{track_id}` to the top of the queue.")
         await log_action(self.bot, interaction)
 
@@ -535,6 +645,7 @@ class Voice(commands.Cog):
         if voice_client and (voice_client.is_playing() or voice_client.is_paused()):
             self.looping[guild_id] = False  # Disable looping when stopping
             voice_client.stop()
+            self.prefetcher.discard(guild_id)
             await interaction.response.send_message("⏹️ Music stopped.")
         else:
             await interaction.response.send_message("❌ No track is currently playing.", ephemeral=True)
@@ -0,0 +1,82 @@
+import asyncio
+from collections import deque
+
+from core import metrics
+
+# animal -> (API URL, function extracting image URLs from the JSON response)
+SOURCES = {
+    "cat": ("https://api.thecatapi.com/v1/images/search?limit=10", lambda data: [e["url"] for e in data]),
+    "dog": ("https://api.thedogapi.com/v1/images/search?limit=10", lambda data: [e["url"] for e in data]),
+    "fox": ("https://randomfox.ca/floof/", lambda data: [data["image"]]),
+}
+
+class AnimalImageProvider:
+    """
+    Keeps a small buffer of prefetched image URLs per animal and refills it in the
+    background, so /cat, /dog and /fox answer from memory. A live fetch only happens
+    when a buffer has run dry.
+    """
+
+    def __init__(self, http, size: int = 5):
+        self.http = http
+        self.size = size
+        self.buffers = {animal: deque() for animal in SOURCES}
+        self.hits = {animal: 0 for animal in SOURCES}
+        self.misses = {animal: 0 for animal in SOURCES}
+        self._refills = {}
+
+    def start(self):
+        for animal in SOURCES:
+            self._schedule_refill(animal)
+        metrics.register("Animal Images", self.stats)
+
+    async def close(self):
+        metrics.unregister("Animal Images")
+        for task in self._refills.values():
+            task.cancel()
+        self._refills.clear()
+
+    async def _fetch(self, animal: str) -> list:
+        url, extract = SOURCES[animal]
+        return extract(await self.http.get_json(url))
+
+    def _schedule_refill(self, animal: str):
+        task = self._refills.get(animal)
+        if len(self.buffers[animal]) < self.size and (task is None or task.done()):
+            self._refills[animal] = asyncio.get_running_loop().create_task(self._refill(animal))
+
+    async def _refill(self, animal: str):
+        buffer = self.buffers[animal]
+        try:
+            while len(buffer) < self.size:
+                urls = await self._fetch(animal)
+                if not urls:
+                    break
+                buffer.extend(urls[:self.size - len(buffer)])
+        except Exception as e:
+            print(f"Error prefetching {animal} images: {e}")
+
+    async def get(self, animal: str) -> str:
+        """Return an image URL, from the buffer when possible. Raises LookupError if none can be fetched."""
+        buffer = self.buffers[animal]
+        if buffer:
+            self.hits[animal] += 1
+            url = buffer.popleft()
+        else:
+            self.misses[animal] += 1
+            try:
+                urls = await self._fetch(animal)
+            except Exception as e:
+                raise LookupError(f"Couldn't fetch a {animal} image right now.") from e
+            if not urls:
+                raise LookupError(f"The {animal} image service returned no images.")
+            url = urls.pop(0)
+            buffer.extend(urls[:self.size])
+        self._schedule_refill(animal)
+        return url
+
+    def stats(self) -> dict:
+        return {
+            animal: f"{len(self.buffers[animal])} buffered, {self.hits[animal]} hits, {self.misses[animal]} misses"
+            for animal in SOURCES
+        }
@@ -0,0 +1,60 @@
+import discord
+
+from core import metrics
+
+# Keep remote streams alive across dropped connections instead of ending the track early
+RECONNECT_OPTIONS = "-reconnect 1 -reconnect_streamed 1 -reconnect_on_network_error 1 -reconnect_delay_max 5"
+
+class AudioSourceFactory:
+    """
+    Builds the audio source for a stream. Discord wants Opus, so an input that is
+    already Opus (YouTube's WebM audio usually is) is remuxed by FFmpeg with codec
+    copy and nothing gets decoded or encoded. Anything else is encoded to Opus by
+    FFmpeg itself instead of being decoded to PCM and encoded frame by frame in
+    the bot process.
+    """
+
+    def __init__(self, bitrate: int = 128, input_buffer: int = 512):
+        self.bitrate = bitrate            # kbps, used when FFmpeg has to encode
+        self.input_buffer = input_buffer  # demuxed packets FFmpeg may queue ahead
+        self.passthrough = 0
+        self.encoded = 0
+        self.probes = 0
+
+    def start(self):
+        metrics.register("Audio sources", self.stats)
+
+    def close(self):
+        metrics.unregister("Audio sources")
+
+    def _before_options(self, url: str) -> str:
+        options = f"-thread_queue_size {self.input_buffer}"
+        if url.startswith(("http://", "https://")):
+            options = f"{RECONNECT_OPTIONS} {options}"
+        return options
+
+    async def create(self, url: str, codec: str = None) -> discord.AudioSource:
+        """
+        An Opus source for `url`. `codec` is the input's audio codec if already
+        known (e.g. yt-dlp's acodec); otherwise it is probed with ffprobe.
+        """
+        if codec is None:
+            self.probes += 1
+            try:
+                codec, _ = await discord.FFmpegOpusAudio.probe(url, method="fallback")
+            except Exception as e:
+                print(f"Audio probe failed, encoding instead: {e}")
+        if codec == "opus":
+            self.passthrough += 1
+        else:
+            self.encoded += 1
+        return discord.FFmpegOpusAudio(
+            url,
+            codec="copy" if codec == "opus" else None,
+            bitrate=self.bitrate,
+            before_options=self._before_options(url),
+            options="-vn",
+        )
+
+    def stats(self) -> dict:
+        return {"passthrough": self.passthrough, "encoded": self.encoded, "probed": self.probes}
@@ -0,0 +1,206 @@
+import hashlib
+import os
+import struct
+import tempfile
+import threading
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlparse
+
+import discord
+
+from core import metrics
+
+PACKET_HEADER = struct.Struct("<H")  # files are a sequence of (length, Opus packet)
+FRAME_SECONDS = discord.opus.Encoder.FRAME_LENGTH / 1000  # audio per Opus packet
+DURATION_TOLERANCE = 2  # seconds a complete recording may differ from the track's duration
+SUFFIX = ".opus"
+
+def canonical_key(url: str) -> str:
+    """A stable cache key: "yt-<video id>" for YouTube links, else a hash of the URL."""
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    for prefix in ("www.", "m.", "music."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    video_id = None
+    if host == "youtu.be":
+        video_id = parsed.path.strip("/").split("/")[0]
+    elif host == "youtube.com":
+        if parsed.path == "/watch":
+            video_id = parse_qs(parsed.query).get("v", [None])[0]
+        elif parsed.path.startswith(("/shorts/", "/live/", "/embed/")):
+            video_id = parsed.path.split("/")[2]
+    if video_id:
+        return f"yt-{video_id}"
+    return "url-" + hashlib.sha1(url.encode("utf-8")).hexdigest()[:20]
+
+class CachedOpusAudio(discord.AudioSource):
+    """Plays Opus packets straight from a cache file; no FFmpeg, no network."""
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+
+    def read(self) -> bytes:
+        header = self._file.read(PACKET_HEADER.size)
+        if len(header) < PACKET_HEADER.size:
+            return b""
+        return self._file.read(PACKET_HEADER.unpack(header)[0])
+
+    def is_opus(self) -> bool:
+        return True
+
+    def cleanup(self):
+        self._file.close()
+
+class RecordingSource(discord.AudioSource):
+    """
+    Wraps an Opus source and copies every packet it reads into a temporary
+    file. If the track plays to the end, the file is moved into the cache in one
+    atomic rename; if it is skipped, grows past the per-entry cap, or ends well
+    short of `duration` (e.g. the stream URL expired mid-track), it is dropped.
+    """
+
+    def __init__(self, source: discord.AudioSource, cache, key: str, duration: float):
+        self.source = source
+        self.cache = cache
+        self.key = key
+        self.duration = duration
+        self._packets = 0
+        fd, self._tmp = tempfile.mkstemp(dir=cache.directory, suffix=".part")
+        self._file = os.fdopen(fd, "wb")
+        self._size = 0
+        self._finished = False
+
+    def read(self) -> bytes:
+        packet = self.source.read()
+        if not packet:
+            self._finished = True
+        elif self._file is not None:
+            self._packets += 1
+            self._size += PACKET_HEADER.size + len(packet)
+            if self._size > self.cache.max_entry_bytes:
+                self._discard()
+            else:
+                self._file.write(PACKET_HEADER.pack(len(packet)))
+                self._file.write(packet)
+        return packet
+
+    def is_opus(self) -> bool:
+        return True
+
+    def _discard(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            os.remove(self._tmp)
+
+    def cleanup(self):
+        self.source.cleanup()
+        if self._file is None:
+            return
+        recorded = self._packets * FRAME_SECONDS
+        if not self._finished or abs(recorded - self.duration) > max(DURATION_TOLERANCE, self.duration * 0.02):
+            self._discard()
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+        self.cache.commit(self.key, self._tmp, self._size)
+
+class AudioCache:
+    """
+    On-disk LRU of played tracks' Opus streams, keyed by canonical video ID and
+    kept under a byte budget. Entries are written to a temporary file and renamed
+    into place, so a crash never leaves a half-written entry behind. Recency is
+    tracked in memory and mirrored to file mtimes so it survives restarts.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_bytes // 10
+        self._entries = OrderedDict()  # key -> size, least recently used first
+        self._lock = threading.Lock()  # commits happen on voice player threads
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        found = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".part"):
+                os.remove(path)  # left over from an interrupted recording
+            elif name.endswith(SUFFIX):
+                stat = os.stat(path)
+                found.append((stat.st_mtime, name[:-len(SUFFIX)], stat.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self.total_bytes += size
+        self._evict()
+        metrics.register("Audio cache", self.stats)
+
+    def close(self):
+        metrics.unregister("Audio cache")
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def contains(self, url: str) -> bool:
+        return canonical_key(url) in self._entries
+
+    def open(self, url: str):
+        """A source playing the cached copy of `url`, or None on a miss."""
+        key = canonical_key(url)
+        with self._lock:
+            size = self._entries.get(key)
+            if size is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+        try:
+            os.utime(self._path(key))
+            source = CachedOpusAudio(self._path(key))
+        except OSError:
+            with self._lock:
+                if self._entries.pop(key, None) is not None:
+                    self.total_bytes -= size
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.bytes_saved += size
+        return source
+
+    def record(self, url: str, source: discord.AudioSource, duration: float) -> discord.AudioSource:
+        """Wrap an Opus source so a complete play of it (`duration` seconds long) is stored in the cache."""
+        if not source.is_opus():
+            return source
+        return RecordingSource(source, self, canonical_key(url), duration)
+
+    def commit(self, key: str, tmp_path: str, size: int):
+        os.replace(tmp_path, self._path(key))
+        with self._lock:
+            self.total_bytes += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            self._evict()
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        ratio = self.hits / lookups if lookups else 0
+        return {
+            "hit ratio": f"{ratio:.0%} ({self.hits}/{lookups})",
+            "bytes saved": f"{self.bytes_saved / 1024 / 1024:.1f} MiB",
+            "size": f"{self.total_bytes / 1024 / 1024:.1f} / {self.max_bytes / 1024 / 1024:.0f} MiB ({len(self._entries)} tracks)",
+        }
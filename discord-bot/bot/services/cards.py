@@ -0,0 +1,97 @@
+import inspect
+
+from PIL import Image
+
+async def _build(builder):
+    """Run a builder that may be a plain function or a coroutine function."""
+    result = builder()
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+class StaticLayer:
+    """
+    An image that is the same on every card, built once by `build()` when the
+    template starts and only pasted afterwards. `when(context)`, if given,
+    decides per card whether it is drawn.
+    """
+
+    def __init__(self, name: str, position: tuple, build, when=None):
+        self.name = name
+        self.position = position
+        self.build = build
+        self.when = when
+        self.image = None
+
+    async def prepare(self):
+        try:
+            self.image = await _build(self.build)
+        except Exception as e:
+            print(f"Error building card layer {self.name}: {e}")
+
+    def paint(self, canvas: Image.Image, context: dict):
+        if self.image is not None:
+            canvas.paste(self.image, self.position, self.image if self.image.mode == "RGBA" else None)
+
+class ImageLayer:
+    """Pastes the card's own image `context[key]` at `position`, through its alpha channel."""
+
+    def __init__(self, key: str, position: tuple = (0, 0), when=None):
+        self.key = key
+        self.position = position
+        self.when = when
+
+    async def prepare(self):
+        pass
+
+    def paint(self, canvas: Image.Image, context: dict):
+        image = context.get(self.key)
+        if image is not None:
+            canvas.paste(image, self.position, image if image.mode == "RGBA" else None)
+
+class DrawLayer:
+    """Per-card content drawn by `draw(canvas, context)`, such as text."""
+
+    def __init__(self, draw, when=None):
+        self.draw = draw
+        self.when = when
+
+    async def prepare(self):
+        pass
+
+    def paint(self, canvas: Image.Image, context: dict):
+        self.draw(canvas, context)
+
+class CardTemplate:
+    """
+    A card image declared as an ordered stack of layers. Static layers and
+    named resources (masks, placeholder images, anything built once and reused
+    by per-card code) are prepared when the template starts, so rendering a card
+    is only compositing the per-card layers over them.
+    """
+
+    def __init__(self, size: tuple, layers: list, resources: dict = None):
+        self.size = size
+        self.layers = layers
+        self.builders = resources or {}
+        self.resources = {}
+
+    async def start(self):
+        for name, builder in self.builders.items():
+            try:
+                self.resources[name] = await _build(builder)
+            except Exception as e:
+                print(f"Error building card resource {name}: {e}")
+                self.resources[name] = None
+        for layer in self.layers:
+            await layer.prepare()
+
+    def resource(self, name: str):
+        return self.resources.get(name)
+
+    def render(self, context: dict) -> Image.Image:
+        canvas = Image.new("RGBA", self.size)
+        for layer in self.layers:
+            if layer.when is None or layer.when(context):
+                layer.paint(canvas, context)
+        return canvas
@@ -0,0 +1,113 @@
+import asyncio
+import json
+import os
+import random
+import time
+
+from core import metrics
+
+# Only the fields we use; the full /all payload is hundreds of KB
+RESTCOUNTRIES_URL = "https://restcountries.com/v3.1/all?fields=name,continents,flags"
+SNAPSHOT_FILE = "countries_cache.json"
+
+class CountryDataset:
+    """
+    Bot-wide country data for /countrychecklist and /flagmatch. The payload is
+    fetched once, trimmed to (name, continent, flag URL) rows, persisted to disk for
+    fast cold starts and refreshed in the background when older than `ttl`.
+    """
+
+    def __init__(self, http, ttl: float = 24 * 60 * 60):
+        self.http = http
+        self.ttl = ttl
+        self.continents = {}  # continent -> sorted country names
+        self.flags = ()       # (name, flag URL) pairs
+        self.fetched_at = 0.0
+        self._ready = None
+        self._task = None
+
+    def _build(self, rows: list):
+        continents, flags = {}, []
+        for name, continent, flag in rows:
+            if continent:
+                continents.setdefault(continent, []).append(name)
+            if flag:
+                flags.append((name, flag))
+        for names in continents.values():
+            names.sort()
+        self.continents = continents
+        self.flags = tuple(flags)
+
+    def _load_snapshot(self):
+        if not os.path.exists(SNAPSHOT_FILE):
+            return None
+        try:
+            with open(SNAPSHOT_FILE, encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Ignoring unreadable country snapshot: {e}")
+            return None
+
+    def _save_snapshot(self, rows: list):
+        tmp = SNAPSHOT_FILE + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"fetched_at": self.fetched_at, "countries": rows}, f, separators=(",", ":"))
+        os.replace(tmp, SNAPSHOT_FILE)
+
+    async def start(self):
+        """Load the on-disk snapshot and schedule background refreshes."""
+        self._ready = asyncio.Event()
+        snapshot = await asyncio.to_thread(self._load_snapshot)
+        if snapshot:
+            self._build(snapshot["countries"])
+            self.fetched_at = snapshot.get("fetched_at", 0.0)
+            self._ready.set()
+        self._task = asyncio.get_running_loop().create_task(self._refresh_loop())
+        metrics.register("Countries", self.stats)
+
+    async def close(self):
+        metrics.unregister("Countries")
+        if self._task:
+            self._task.cancel()
+
+    async def _refresh_loop(self):
+        while True:
+            due = self.fetched_at + self.ttl - time.time()
+            if due > 0:
+                await asyncio.sleep(due)
+            if not await self.refresh():
+                await asyncio.sleep(5 * 60)  # retry sooner after a failure
+
+    async def refresh(self) -> bool:
+        """Fetch fresh data from restcountries.com; returns False on failure."""
+        try:
+            data = await self.http.get_json(RESTCOUNTRIES_URL)
+            rows = []
+            for entry in data:
+                name = entry.get("name", {}).get("common")
+                if not name:
+                    continue
+                continents = entry.get("continents") or [None]
+                rows.append([name, continents[0], entry.get("flags", {}).get("png")])
+            self._build(rows)
+            self.fetched_at = time.time()
+            await asyncio.to_thread(self._save_snapshot, rows)
+            print(f"Loaded {len(rows)} countries across {len(self.continents)} continents.")
+            return True
+        except Exception as e:
+            print(f"Failed to load country data: {e}")
+            return False
+        finally:
+            # Never leave waiters hanging; an empty dataset is reported by the callers
+            self._ready.set()
+
+    async def wait_ready(self):
+        await self._ready.wait()
+
+    def sample_flags(self, k: int = 4) -> list:
+        """Pick `k` distinct (name, flag URL) pairs from memory."""
+        return random.sample(self.flags, k)
+
+    def stats(self) -> dict:
+        age = f"{(time.time() - self.fetched_at) / 3600:.1f} h" if self.fetched_at else "never"
+        return {"countries": len(self.flags), "continents": len(self.continents), "age": age}
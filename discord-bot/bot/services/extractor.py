@@ -0,0 +1,179 @@
+import asyncio
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import yt_dlp
+
+from core import metrics
+
+class ExtractionService:
+    """
+    Runs yt-dlp metadata extraction on a small dedicated thread pool so a slow
+    site never blocks the event loop. The pool size caps concurrent extractions,
+    each caller waits at most `timeout` seconds, and concurrent requests for the
+    same URL share a single extraction. An extraction nobody is waiting for any
+    more is cancelled if it has not started yet.
+    """
+
+    def __init__(self, workers: int = 2, timeout: float = 30, cookies_file: str = None):
+        self.workers = workers
+        self.timeout = timeout
+        self.cookies_file = cookies_file
+        self._executor = None
+        self._inflight = {}  # url -> [future, waiter count]
+        self.extractions = 0
+        self.completed = 0
+        self.shared = 0
+        self.timeouts = 0
+        self.failures = 0
+        self.cancelled = 0
+        self.total_ms = 0.0
+
+    def start(self):
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="yt-dlp")
+        metrics.register("Extraction", self.stats)
+
+    def close(self):
+        metrics.unregister("Extraction")
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _options(self) -> dict:
+        options = {
+            "format": "bestaudio/best",
+            "quiet": True,
+            "no_warnings": True,
+            "socket_timeout": self.timeout,  # bounds the worker even after callers give up
+        }
+        if self.cookies_file and os.path.exists(self.cookies_file):
+            options["cookiefile"] = self.cookies_file
+        return options
+
+    def _extract_sync(self, url: str, options: dict) -> dict:
+        start = time.perf_counter()
+        try:
+            with yt_dlp.YoutubeDL(options) as ydl:
+                return ydl.extract_info(url, download=False)
+        finally:
+            self.completed += 1
+            self.total_ms += (time.perf_counter() - start) * 1000
+
+    def _start_extraction(self, url: str) -> list:
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, self._extract_sync, url, self._options())
+        entry = [future, 0]
+        self.extractions += 1
+
+        def done(fut):
+            if self._inflight.get(url) is entry:
+                del self._inflight[url]
+            if fut.cancelled():
+                self.cancelled += 1
+            elif fut.exception() is not None:  # also marks the exception as retrieved
+                self.failures += 1
+
+        future.add_done_callback(done)
+        self._inflight[url] = entry
+        return entry
+
+    async def extract(self, url: str) -> dict:
+        """
+        Return yt-dlp's info dict for `url`. Raises asyncio.TimeoutError after
+        `timeout` seconds, or whatever yt-dlp raised.
+        """
+        entry = self._inflight.get(url)
+        if entry is None:
+            entry = self._start_extraction(url)
+        else:
+            self.shared += 1
+        future = entry[0]
+        entry[1] += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0 and not future.done():
+                future.cancel()  # a queued extraction never starts; a running one finishes unobserved
+
+    def _stream_playlist(self, url: str, limit: int, batch_size: int, emit, stop: threading.Event):
+        # Runs on a worker. process=False hands back the extractor's lazy entry
+        # generator, so entries are emitted in batches while later pages load.
+        options = self._options()
+        options.update(extract_flat="in_playlist", lazy_playlist=True, noplaylist=False)
+        try:
+            with yt_dlp.YoutubeDL(options) as ydl:
+                info = ydl.extract_info(url, download=False, process=False)
+                for _ in range(3):  # follow redirects such as watch?v=...&list=... -> playlist
+                    if info.get("_type") not in ("url", "url_transparent") or not info.get("url"):
+                        break
+                    info = ydl.extract_info(info["url"], download=False, ie_key=info.get("ie_key"), process=False)
+                title = info.get("title")
+                if info.get("_type") != "playlist":
+                    emit((title, [info]))
+                    return
+                batch = []
+                for entry in itertools.islice(info.get("entries") or (), limit):
+                    if stop.is_set():
+                        return
+                    if entry:
+                        batch.append(entry)
+                    if len(batch) >= batch_size:
+                        emit((title, batch))
+                        batch = []
+                if batch:
+                    emit((title, batch))
+        except Exception as e:
+            emit(e)
+        finally:
+            emit(None)
+
+    async def playlist(self, url: str, limit: int, batch_size: int = 25):
+        """
+        Flat-extract a playlist, yielding (playlist title, [entry dicts]) batches as
+        they are discovered. Entries are not resolved; each has at least a URL and
+        usually a title. Raises asyncio.TimeoutError if no batch arrives within
+        `timeout` seconds. Stops the worker early if the caller stops iterating.
+        """
+        loop = asyncio.get_running_loop()
+        batches = asyncio.Queue()
+        stop = threading.Event()
+
+        def emit(item):
+            try:
+                loop.call_soon_threadsafe(batches.put_nowait, item)
+            except RuntimeError:
+                stop.set()  # event loop closed; nobody is listening
+
+        self.extractions += 1
+        loop.run_in_executor(self._executor, self._stream_playlist, url, limit, batch_size, emit, stop)
+        try:
+            while True:
+                item = await asyncio.wait_for(batches.get(), self.timeout)
+                if item is None:
+                    return
+                if isinstance(item, Exception):
+                    self.failures += 1
+                    raise item
+                yield item
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            stop.set()
+
+    def stats(self) -> dict:
+        avg = self.total_ms / self.completed if self.completed else 0
+        return {
+            "extractions": f"{self.extractions} ({avg:.0f} ms avg)",
+            "in flight": len(self._inflight),
+            "shared": self.shared,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+            "cancelled": self.cancelled,
+        }
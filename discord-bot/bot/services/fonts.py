@@ -0,0 +1,247 @@
+import asyncio
+import hashlib
+import io
+import json
+import os
+import tempfile
+import time
+from collections import OrderedDict
+
+import aiohttp
+from PIL import ImageFont
+
+from core import metrics
+
+DEFAULT_FONT_URL = "https://raw.githubusercontent.com/dolbydu/font/master/unicode/Microsoft%20Yahei.ttf"
+FONT_MAGIC = (b"\x00\x01\x00\x00", b"OTTO", b"true", b"ttcf")  # TrueType, OpenType/CFF, Apple, collections
+SUFFIX = ".font"
+INDEX_FILE = "index.json"
+DOWNLOAD_TIMEOUT = aiohttp.ClientTimeout(total=120)  # CJK fonts run to tens of MB
+FAILED_TTL = 10 * 60  # a URL that didn't yield a usable font is not retried for this long
+
+class InvalidFont(ValueError):
+    """Raised when downloaded bytes are too large or don't parse as a font."""
+
+def validate_font(data: bytes, max_bytes: int):
+    """Raise InvalidFont unless `data` is a parseable TrueType/OpenType font within the size cap."""
+    if len(data) > max_bytes:
+        raise InvalidFont(f"font is {len(data)} bytes (cap {max_bytes})")
+    if data[:4] not in FONT_MAGIC:
+        raise InvalidFont("not a TrueType/OpenType font")
+    try:
+        ImageFont.truetype(io.BytesIO(data), 12)
+    except OSError as e:
+        raise InvalidFont(f"font does not parse: {e}") from e
+
+class FontCache:
+    """
+    Font files for rendered images. Files are stored on disk under their SHA-256,
+    with an index mapping source URLs to hashes, so a font URL is downloaded and
+    validated once. Font bytes are held in memory, and parsed FreeTypeFont objects
+    are pooled by (hash, size), so a warm lookup does no I/O and no parsing.
+    Bundled fonts are loaded from local files at start; the default font is the
+    first bundled one found, else DEFAULT_FONT_URL fetched into the cache.
+    """
+
+    def __init__(self, http, directory: str, bundled=(), max_bytes: int = 200 * 1024 * 1024,
+                 max_font_bytes: int = 25 * 1024 * 1024, pool_size: int = 64):
+        self.http = http
+        self.directory = directory
+        self.bundled = list(bundled)
+        self.max_bytes = max_bytes            # disk budget for downloaded fonts
+        self.max_font_bytes = max_font_bytes  # per-file cap, applied to downloads
+        self.pool_size = pool_size
+        self.default = None                   # hash of the default font, once available
+        self._index = {}                      # source URL -> hash
+        self._data = {}                       # hash -> font file bytes
+        self._pool = OrderedDict()            # (hash, size) -> FreeTypeFont, least recently used first
+        self._pinned = set()                  # hashes never evicted from disk: bundled and default
+        self._inflight = {}                   # url -> future of a download in progress
+        self._failed = {}                     # url -> time before which it isn't retried
+        self._used = {}                       # hash -> wall time it was last resolved or drawn with
+        self.hits = 0
+        self.loads = 0
+        self.downloads = 0
+
+    # ----- Lifecycle -----
+    async def start(self):
+        try:
+            await asyncio.to_thread(self._load_disk)
+            for path in self.bundled:
+                key = await asyncio.to_thread(self._load_bundled, path)
+                if key and self.default is None:
+                    self.default = key
+            if self.default is None:
+                self.default = await self.resolve(DEFAULT_FONT_URL)
+        except Exception as e:
+            print(f"Error loading the font cache: {e}")
+        if self.default:
+            self._pinned.add(self.default)
+        else:
+            print("No default font available; falling back to Pillow's built-in font")
+        metrics.register("Fonts", self.stats)
+
+    def close(self):
+        metrics.unregister("Fonts")
+
+    def _load_disk(self):
+        os.makedirs(self.directory, exist_ok=True)
+        try:
+            with open(os.path.join(self.directory, INDEX_FILE), encoding="utf-8") as f:
+                index = json.load(f)
+        except (FileNotFoundError, ValueError):
+            index = {}
+        for name in os.listdir(self.directory):
+            if name.endswith(".part"):
+                os.remove(os.path.join(self.directory, name))  # left over from an interrupted download
+        self._index = {url: key for url, key in index.items() if os.path.exists(self._path(key))}
+
+    def _load_bundled(self, path: str):
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            validate_font(data, max(self.max_font_bytes, len(data)))  # local files aren't size-capped
+        except (OSError, InvalidFont) as e:
+            print(f"Bundled font {path} not loaded: {e}")
+            return None
+        key = hashlib.sha256(data).hexdigest()
+        self._data[key] = data
+        self._pinned.add(key)
+        return key
+
+    # ----- Disk -----
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def _store(self, url: str, data: bytes) -> tuple:
+        """Write a validated font under its hash and record the URL; runs off the event loop."""
+        key = hashlib.sha256(data).hexdigest()
+        if not os.path.exists(self._path(key)):
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".part")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self._path(key))
+        self._index[url] = key
+        evicted = self._evict_disk()
+        self._write_index()
+        return key, evicted
+
+    def _write_index(self):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self._index, f)
+        os.replace(tmp, os.path.join(self.directory, INDEX_FILE))
+
+    def _evict_disk(self) -> list:
+        """Remove least recently used unpinned fonts over the disk budget; returns their hashes."""
+        files, evicted = [], []
+        for name in os.listdir(self.directory):
+            if name.endswith(SUFFIX):
+                key = name[:-len(SUFFIX)]
+                stat = os.stat(os.path.join(self.directory, name))
+                # fonts served from memory never touch their file, so their use is tracked in _used
+                files.append((max(stat.st_mtime, self._used.get(key, 0)), key, stat.st_size))
+        total = sum(size for _, _, size in files)
+        for _, key, size in sorted(files):
+            if total <= self.max_bytes:
+                break
+            if key in self._pinned:
+                continue
+            os.remove(self._path(key))
+            total -= size
+            evicted.append(key)
+        if evicted:
+            self._index = {url: k for url, k in self._index.items() if k not in evicted}
+            for key in evicted:
+                self._used.pop(key, None)
+        return evicted
+
+    # ----- Lookup -----
+    async def resolve(self, url: str = None):
+        """
+        The hash of the font at `url` (the default font if no URL is given),
+        downloading and validating it on first use. None if it can't be used.
+        """
+        if not url:
+            return self.default
+        key = self._index.get(url)
+        if key is not None:
+            self._used[key] = time.time()
+            return key
+        if self._failed.get(url, 0) > time.monotonic():
+            return None
+        future = self._inflight.get(url)
+        if future is None:
+            future = self._inflight[url] = asyncio.ensure_future(self._download(url))
+            future.add_done_callback(lambda _: self._inflight.pop(url, None))
+        return await asyncio.shield(future)
+
+    def cached(self, url: str = None):
+        """The font hash resolve() would return, if known without downloading anything; else None."""
+        if not url:
+            return self.default
+        key = self._index.get(url)
+        if key is None and self._failed.get(url, 0) > time.monotonic():
+            return self.default  # the caller falls back to the default font
+        if key is not None:
+            self._used[key] = time.time()
+        return key
+
+    async def _download(self, url: str):
+        self.downloads += 1
+        try:
+            data = await self.http.get_bytes(url, max_bytes=self.max_font_bytes, timeout=DOWNLOAD_TIMEOUT)
+            await asyncio.to_thread(validate_font, data, self.max_font_bytes)
+            key, evicted = await asyncio.to_thread(self._store, url, data)
+        except Exception as e:
+            print(f"Font {url} not usable: {e}")
+            self._failed[url] = time.monotonic() + FAILED_TTL
+            return None
+        for old in evicted:
+            self._data.pop(old, None)
+            for pooled in [k for k in self._pool if k[0] == old]:
+                del self._pool[pooled]
+        self._data[key] = data
+        return key
+
+    def font(self, key, size: int) -> ImageFont.FreeTypeFont:
+        """A FreeTypeFont for the font hash `key` at `size`, reused across calls."""
+        if key is None:
+            return ImageFont.load_default(size)
+        self._used[key] = time.time()
+        font = self._pool.get((key, size))
+        if font is not None:
+            self.hits += 1
+            self._pool.move_to_end((key, size))
+            return font
+        self.loads += 1
+        data = self._data.get(key)
+        if data is None:
+            try:
+                with open(self._path(key), "rb") as f:
+                    data = self._data[key] = f.read()
+                os.utime(self._path(key))
+            except OSError as e:
+                # e.g. evicted from disk by a download since it left memory
+                print(f"Font {key} not readable: {e}")
+                return self.font(self.default if key != self.default else None, size)
+        # BytesIO.read() hands back `data` itself, so every size shares one copy of the file
+        font = ImageFont.truetype(io.BytesIO(data), size)
+        self._pool[(key, size)] = font
+        while len(self._pool) > self.pool_size:
+            (old, _), _ = self._pool.popitem(last=False)
+            if old not in self._pinned and not any(k[0] == old for k in self._pool):
+                self._data.pop(old, None)  # no sizes of it left; reread from disk if needed again
+        return font
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.loads
+        ratio = self.hits / lookups if lookups else 0
+        return {
+            "pool hit ratio": f"{ratio:.0%} ({self.hits}/{lookups})",
+            "pooled": f"{len(self._pool)} / {self.pool_size}",
+            "fonts": f"{len(self._data)} in memory ({sum(map(len, self._data.values())) / 1024 / 1024:.1f} MiB), {len(self._index)} URLs",
+            "downloads": self.downloads,
+        }
@@ -0,0 +1,60 @@
+import json
+from collections import deque, namedtuple
+
+class HistoryRecord(namedtuple("HistoryRecord", "track_id song_link title artist requestor_userid datetime_now")):
+    """A played track, stored as a compact tuple rather than a dict."""
+
+    __slots__ = ()
+
+    @classmethod
+    def from_track(cls, track: dict):
+        return cls(*(track.get(field, "") for field in cls._fields))
+
+    def as_track(self) -> dict:
+        return self._asdict()
+
+class PlaybackHistory:
+    """
+    Per-guild ring buffers of the last `capacity` played tracks. Replaying the
+    track that is already newest (loop mode) does not add an entry. When a storage
+    backend is given, entries are also written to the database and reloaded on
+    start, trimmed to the same capacity.
+    """
+
+    def __init__(self, capacity: int = 50, storage=None):
+        self.capacity = capacity
+        self.storage = storage
+        self._guilds = {}  # guild_id -> deque of HistoryRecord
+
+    async def start(self):
+        if self.storage is None:
+            return
+        for guild_id, data in await self.storage.load_history(self.capacity):
+            self._buffer(guild_id).append(HistoryRecord(*json.loads(data)))
+
+    def _buffer(self, guild_id: int) -> deque:
+        buffer = self._guilds.get(guild_id)
+        if buffer is None:
+            buffer = self._guilds[guild_id] = deque(maxlen=self.capacity)
+        return buffer
+
+    async def record(self, guild_id: int, track: dict):
+        buffer = self._buffer(guild_id)
+        if buffer and buffer[-1].track_id == track.get("track_id"):
+            return  # looping or restarting the current track
+        entry = HistoryRecord.from_track(track)
+        buffer.append(entry)
+        if self.storage is not None:
+            await self.storage.append_history(guild_id, json.dumps(entry), self.capacity)
+
+    def current(self, guild_id: int):
+        buffer = self._guilds.get(guild_id)
+        return buffer[-1] if buffer else None
+
+    def previous(self, guild_id: int):
+        buffer = self._guilds.get(guild_id)
+        return buffer[-2] if buffer and len(buffer) >= 2 else None
+
+    def entries(self, guild_id: int) -> list:
+        """Every remembered track for the guild, newest first."""
+        return list(reversed(self._guilds.get(guild_id, ())))
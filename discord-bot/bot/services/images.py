@@ -0,0 +1,95 @@
+import asyncio
+import io
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+from PIL import Image
+
+from core import metrics
+
+def asset_key(url: str) -> str:
+    """
+    Cache key for an image URL. Discord CDN paths already end in the asset's
+    content hash (/avatars/<user>/<hash>.png), so the path alone identifies the
+    image and query parameters like ?size= are ignored.
+    """
+    parsed = urlparse(url)
+    return parsed.netloc + parsed.path
+
+def image_bytes(image: Image.Image) -> int:
+    return image.width * image.height * len(image.getbands())
+
+class ImageCache:
+    """
+    LRU of downloaded images after decoding and processing, keyed by
+    (asset key, variant) and kept under a byte budget of decoded pixels. The
+    variant names the processing (e.g. ("banner", 900, 450)), so a hit skips the
+    download, the decode and the resize/blur alike. Decoding and processing run
+    off the event loop, and concurrent requests for one entry share the work.
+    Cached images are shared: callers must not modify them.
+    """
+
+    def __init__(self, http, max_bytes: int = 64 * 1024 * 1024):
+        self.http = http
+        self.max_bytes = max_bytes
+        self._images = OrderedDict()  # (asset key, variant) -> Image, least recently used first
+        self._inflight = {}           # (asset key, variant) -> future of a fetch in progress
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def start(self):
+        metrics.register("Images", self.stats)
+
+    def close(self):
+        metrics.unregister("Images")
+
+    async def get(self, url: str, variant, process=None) -> Image.Image:
+        """
+        The image at `url` in RGBA, passed through `process(image)` if given
+        (which returns the image to cache). Raises if it can't be fetched or decoded.
+        """
+        key = (asset_key(url), variant)
+        image = self._images.get(key)
+        if image is not None:
+            self.hits += 1
+            self._images.move_to_end(key)
+            return image
+        future = self._inflight.get(key)
+        if future is None:
+            self.misses += 1
+            future = self._inflight[key] = asyncio.ensure_future(self._fetch(key, url, process))
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def _fetch(self, key, url: str, process) -> Image.Image:
+        data = await self.http.get_bytes(url)
+        image = await asyncio.to_thread(self._decode, data, process)
+        self._put(key, image)
+        return image
+
+    @staticmethod
+    def _decode(data: bytes, process) -> Image.Image:
+        image = Image.open(io.BytesIO(data)).convert("RGBA")
+        return process(image) if process else image
+
+    def _put(self, key, image: Image.Image):
+        size = image_bytes(image)
+        if size > self.max_bytes:
+            return
+        old = self._images.pop(key, None)
+        if old is not None:
+            self.total_bytes -= image_bytes(old)
+        self._images[key] = image
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes:
+            _, evicted = self._images.popitem(last=False)
+            self.total_bytes -= image_bytes(evicted)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        ratio = self.hits / lookups if lookups else 0
+        return {
+            "hit ratio": f"{ratio:.0%} ({self.hits}/{lookups})",
+            "size": f"{self.total_bytes / 1024 / 1024:.1f} / {self.max_bytes / 1024 / 1024:.0f} MiB ({len(self._images)} images)",
+        }
@@ -0,0 +1,126 @@
+import asyncio
+import time
+
+from core import metrics
+
+class NextTrackPrefetcher:
+    """
+    Gets the head of a guild's queue ready while the current track is still
+    playing. The stream URL is resolved straight away, and shortly before the
+    current track ends the audio source is opened too, so the hand-off when the
+    track finishes only has to start playback. Transition gaps (track end to next
+    track start) are measured for /dev stats.
+    """
+
+    def __init__(self, queues, resolver, open_source, preopen_lead: float = 5, audio_cache=None):
+        self.queues = queues
+        self.resolver = resolver
+        self.audio_cache = audio_cache    # tracks already cached on disk need no resolving
+        self.open_source = open_source    # coroutine: track -> AudioSource
+        self.preopen_lead = preopen_lead  # seconds before the end to open the next source; 0 disables
+        self._tasks = {}     # guild_id -> prefetch task
+        self._prepared = {}  # guild_id -> (track_id, source)
+        self._ended = {}     # guild_id -> perf_counter() when the last track ended
+        self._current = {}   # guild_id -> (monotonic start, duration or None) of the playing track
+        self.prepared_hits = 0
+        self.prepared_misses = 0
+        self.gaps = 0
+        self.gap_total_ms = 0.0
+        self.gap_max_ms = 0.0
+        self.gap_last_ms = 0.0
+
+    def start(self):
+        metrics.register("Transitions", self.stats)
+
+    def close(self):
+        metrics.unregister("Transitions")
+        for guild_id in list(self._tasks):
+            self.discard(guild_id)
+
+    # ----- Prefetching -----
+
+    def schedule(self, guild_id: int):
+        """(Re)start preparing the guild's next track; call when a track starts or the queue changes."""
+        if guild_id not in self._current:
+            return  # nothing playing; the next /play resolves on demand
+        task = self._tasks.pop(guild_id, None)
+        if task:
+            task.cancel()
+        self._tasks[guild_id] = asyncio.get_running_loop().create_task(self._prefetch(guild_id))
+
+    async def _prefetch(self, guild_id: int):
+        started, duration = self._current[guild_id]
+        head = self.queues.peek(guild_id)
+        if head is None:
+            self._drop_prepared(guild_id)  # the queue was cleared or emptied since it was opened
+            return
+        prepared = self._prepared.get(guild_id)
+        if prepared and prepared[0] == head["track_id"]:
+            return
+        self._drop_prepared(guild_id)
+        try:
+            link = head["song_link"]
+            if "cdn.discordapp.com" not in link and not (self.audio_cache and self.audio_cache.contains(link)):
+                await self.resolver.stream_url(link)
+            if not self.preopen_lead or not duration:
+                return
+            # An opened source starts buffering immediately, so only open it near the end
+            await asyncio.sleep(max(0, started + duration - self.preopen_lead - time.monotonic()))
+            if self.queues.peek(guild_id) is not head:
+                return
+            self._prepared[guild_id] = (head["track_id"], await self.open_source(head))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Failed to prefetch next track for guild {guild_id}: {e}")
+
+    def take(self, guild_id: int, track: dict):
+        """The pre-opened source for `track`, or None if it wasn't prepared."""
+        prepared = self._prepared.get(guild_id)
+        if prepared and prepared[0] == track["track_id"]:
+            del self._prepared[guild_id]
+            self.prepared_hits += 1
+            return prepared[1]
+        self.prepared_misses += 1
+        return None
+
+    def _drop_prepared(self, guild_id: int):
+        prepared = self._prepared.pop(guild_id, None)
+        if prepared:
+            prepared[1].cleanup()
+
+    def discard(self, guild_id: int):
+        """Forget anything prepared for the guild (playback stopped or the bot left)."""
+        task = self._tasks.pop(guild_id, None)
+        if task:
+            task.cancel()
+        self._drop_prepared(guild_id)
+        self._ended.pop(guild_id, None)
+        self._current.pop(guild_id, None)
+
+    # ----- Transition gaps -----
+
+    def track_ended(self, guild_id: int):
+        # Called from the voice thread; only stores a timestamp
+        self._ended[guild_id] = time.perf_counter()
+
+    def track_started(self, guild_id: int, duration: float = None):
+        """Record that a track began playing, then prepare the one after it."""
+        self._current[guild_id] = (time.monotonic(), duration)
+        self.schedule(guild_id)
+        ended = self._ended.pop(guild_id, None)
+        if ended is None:
+            return
+        gap_ms = (time.perf_counter() - ended) * 1000
+        self.gaps += 1
+        self.gap_total_ms += gap_ms
+        self.gap_last_ms = gap_ms
+        self.gap_max_ms = max(self.gap_max_ms, gap_ms)
+
+    def stats(self) -> dict:
+        avg = self.gap_total_ms / self.gaps if self.gaps else 0
+        return {
+            "gap": f"{avg:.0f} ms avg, {self.gap_last_ms:.0f} ms last, {self.gap_max_ms:.0f} ms max ({self.gaps})",
+            "pre-opened": f"{self.prepared_hits} used / {self.prepared_misses} cold",
+            "prefetching": sum(not task.done() for task in self._tasks.values()),
+        }
@@ -0,0 +1,268 @@
+import asyncio
+import bisect
+import itertools
+import json
+import time
+from collections import OrderedDict
+
+from core import metrics
+
+BASE36 = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+def base36(n: int) -> str:
+    digits = ""
+    while True:
+        n, rem = divmod(n, 36)
+        digits = BASE36[rem] + digits
+        if not n:
+            return digits
+
+class TrackIdAllocator:
+    """
+    Hands out short track IDs without any lookups: "<session>-<counter>", both in
+    base36. The session number is the database row id of this bot session, so IDs
+    from earlier runs (still in a replayed queue) can never collide with new ones.
+    """
+
+    def __init__(self, session_number: int):
+        self.prefix = base36(session_number) + "-"
+        self._counter = itertools.count(1)
+
+    def next(self) -> str:
+        return self.prefix + base36(next(self._counter))
+
+class GuildQueue:
+    """
+    One guild's playback queue. Tracks are held in insertion order in an
+    OrderedDict keyed by track id (a linked list plus an id map), so append, pop,
+    remove and bump are all O(1). A sorted list of the live IDs backs prefix
+    lookups for autocomplete. Mutate it only while holding `lock`.
+    """
+
+    __slots__ = ("guild_id", "tracks", "ids", "lock")
+
+    def __init__(self, guild_id: int):
+        self.guild_id = guild_id
+        self.tracks = OrderedDict()  # track_id -> track dict
+        self.ids = []                # sorted track ids
+        self.lock = asyncio.Lock()
+
+    def __len__(self):
+        return len(self.tracks)
+
+    def __contains__(self, track_id):
+        return track_id in self.tracks
+
+    def append(self, track: dict):
+        track_id = track["track_id"]
+        if track_id not in self.tracks:
+            bisect.insort(self.ids, track_id)
+        self.tracks[track_id] = track
+
+    def _unindex(self, track_id: str):
+        idx = bisect.bisect_left(self.ids, track_id)
+        if idx < len(self.ids) and self.ids[idx] == track_id:
+            del self.ids[idx]
+
+    def peek(self):
+        return next(iter(self.tracks.values()), None)
+
+    def popleft(self):
+        if not self.tracks:
+            return None
+        track_id, track = self.tracks.popitem(last=False)
+        self._unindex(track_id)
+        return track
+
+    def remove(self, track_id: str) -> bool:
+        if self.tracks.pop(track_id, None) is None:
+            return False
+        self._unindex(track_id)
+        return True
+
+    def bump(self, track_id: str) -> bool:
+        if track_id not in self.tracks:
+            return False
+        self.tracks.move_to_end(track_id, last=False)
+        return True
+
+    def clear(self):
+        self.tracks.clear()
+        self.ids.clear()
+
+    def complete(self, prefix: str, limit: int) -> list:
+        """Up to `limit` queued tracks whose id starts with `prefix`, in id order."""
+        start = bisect.bisect_left(self.ids, prefix)
+        matches = []
+        for track_id in itertools.islice(self.ids, start, start + limit):
+            if not track_id.startswith(prefix):
+                break
+            matches.append(self.tracks[track_id])
+        return matches
+
+    def snapshot(self) -> list:
+        return list(self.tracks.values())
+
+class QueueEngine:
+    """
+    Per-guild playback queues kept in memory. Every change is appended to a
+    journal in storage (written off the event loop, in order); the journal is
+    replayed on startup and compacted down to the live queues once it grows.
+    """
+
+    def __init__(self, storage, compact_every: int = 1000):
+        self.storage = storage
+        self.compact_every = compact_every
+        self.queues = {}  # guild_id -> GuildQueue
+        self.journal_records = 0  # records written since the last compaction
+        self.compactions = 0
+        self.replay_ms = 0.0
+        self._compacting = None
+
+    def get(self, guild_id: int) -> GuildQueue:
+        queue = self.queues.get(guild_id)
+        if queue is None:
+            queue = self.queues[guild_id] = GuildQueue(guild_id)
+        return queue
+
+    # ----- Lifecycle -----
+
+    async def start(self):
+        """Rebuild every guild's queue from the journal, then compact it."""
+        start = time.perf_counter()
+        records = await self.storage.queue_journal()
+        for guild_id, op, track_id, data in records:
+            self._apply(self.get(guild_id), op, track_id, data)
+        self.replay_ms = (time.perf_counter() - start) * 1000
+        print(f"Replayed {len(records)} queue journal record(s) into "
+              f"{sum(len(q) for q in self.queues.values())} queued track(s) in {self.replay_ms:.0f} ms")
+        await self.compact()
+        metrics.register("Queues", self.stats)
+
+    async def close(self):
+        metrics.unregister("Queues")
+        if self._compacting:
+            await self._compacting
+        await self.compact()
+
+    @staticmethod
+    def _apply(queue: GuildQueue, op: str, track_id: str, data: str):
+        if op == "add":
+            queue.append(json.loads(data))
+        elif op == "remove":
+            queue.remove(track_id)
+        elif op == "bump":
+            queue.bump(track_id)
+        elif op == "clear":
+            queue.clear()
+
+    # ----- Journal -----
+
+    async def _journal(self, guild_id: int, op: str, track_id: str = None, data: str = None):
+        # Called right after the in-memory change with no await in between, so
+        # records reach the storage worker in the same order as the changes.
+        self.journal_records += 1
+        write = self.storage.append_queue_journal([(guild_id, op, track_id, data)])
+        self._maybe_compact()
+        await write
+
+    def _maybe_compact(self):
+        """Start a background compaction once enough records have been journalled."""
+        if self.journal_records >= self.compact_every and self._compacting is None:
+            self._compacting = asyncio.get_running_loop().create_task(self._compact_in_background())
+
+    async def _compact_in_background(self):
+        try:
+            await self.compact()
+        finally:
+            self._compacting = None
+
+    async def compact(self):
+        """Replace the journal with one "add" record per queued track."""
+        # The snapshot is taken and submitted in one step, so any change made after
+        # it is journalled after the compaction.
+        records = [
+            (guild_id, "add", track["track_id"], json.dumps(track))
+            for guild_id, queue in self.queues.items()
+            for track in queue.tracks.values()
+        ]
+        self.journal_records = 0
+        await self.storage.compact_queue_journal(records)
+        self.compactions += 1
+
+    # ----- Queue operations -----
+
+    async def enqueue(self, guild_id: int, track: dict):
+        queue = self.get(guild_id)
+        async with queue.lock:
+            queue.append(track)
+            await self._journal(guild_id, "add", track["track_id"], json.dumps(track))
+
+    async def enqueue_many(self, guild_id: int, tracks: list):
+        """Append several tracks with a single journal write."""
+        queue = self.get(guild_id)
+        async with queue.lock:
+            for track in tracks:
+                queue.append(track)
+            self.journal_records += len(tracks)
+            write = self.storage.append_queue_journal(
+                [(guild_id, "add", track["track_id"], json.dumps(track)) for track in tracks]
+            )
+            self._maybe_compact()
+            await write
+
+    async def pop(self, guild_id: int):
+        """Remove and return the track at the head of the guild's queue, or None."""
+        queue = self.get(guild_id)
+        async with queue.lock:
+            track = queue.popleft()
+            if track is not None:
+                await self._journal(guild_id, "remove", track["track_id"])
+            return track
+
+    async def remove(self, guild_id: int, track_id: str) -> bool:
+        queue = self.get(guild_id)
+        async with queue.lock:
+            if not queue.remove(track_id):
+                return False
+            await self._journal(guild_id, "remove", track_id)
+            return True
+
+    async def bump(self, guild_id: int, track_id: str) -> bool:
+        """Move a track to the head of the guild's queue."""
+        queue = self.get(guild_id)
+        async with queue.lock:
+            if not queue.bump(track_id):
+                return False
+            await self._journal(guild_id, "bump", track_id)
+            return True
+
+    async def clear(self, guild_id: int):
+        queue = self.get(guild_id)
+        async with queue.lock:
+            queue.clear()
+            await self._journal(guild_id, "clear")
+
+    def tracks(self, guild_id: int) -> list:
+        queue = self.queues.get(guild_id)
+        return queue.snapshot() if queue else []
+
+    def peek(self, guild_id: int):
+        """The track at the head of the guild's queue, without removing it."""
+        queue = self.queues.get(guild_id)
+        return queue.peek() if queue else None
+
+    def complete(self, guild_id: int, prefix: str, limit: int = 25) -> list:
+        """Queued tracks whose id starts with `prefix`, for autocomplete."""
+        queue = self.queues.get(guild_id)
+        return queue.complete(prefix, limit) if queue else []
+
+    def stats(self) -> dict:
+        active = [q for q in self.queues.values() if q.tracks]
+        return {
+            "guilds with tracks": len(active),
+            "queued tracks": sum(len(q) for q in active),
+            "journal records": self.journal_records,
+            "compactions": self.compactions,
+            "last replay": f"{self.replay_ms:.0f} ms",
+        }
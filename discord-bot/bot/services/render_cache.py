@@ -0,0 +1,148 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+
+from core import metrics
+
+def fingerprint(*inputs) -> str:
+    """A stable hash of everything that affects a rendered image."""
+    data = json.dumps(inputs, default=str, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+class RenderCache:
+    """
+    Encoded images (e.g. /profile badges) keyed by a fingerprint of their
+    inputs, so an unchanged badge is uploaded again without being rendered. An
+    in-memory LRU holds up to `max_bytes`; with a directory, entries are also
+    written to disk (atomically) and kept under `disk_max_bytes`, so they
+    survive restarts and outlive the memory tier.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, directory: str = "", disk_max_bytes: int = 256 * 1024 * 1024,
+                 suffix: str = ".png"):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.disk_max_bytes = disk_max_bytes
+        self.suffix = suffix
+        self._memory = OrderedDict()  # fingerprint -> bytes, least recently used first
+        self._disk = OrderedDict()    # fingerprint -> size on disk, least recently used first
+        self.memory_bytes = 0
+        self.disk_bytes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    async def start(self):
+        if self.directory:
+            await asyncio.to_thread(self._scan)
+        metrics.register("Rendered images", self.stats)
+
+    def close(self):
+        metrics.unregister("Rendered images")
+
+    def _scan(self):
+        os.makedirs(self.directory, exist_ok=True)
+        found = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".part"):
+                os.remove(path)
+            elif name.endswith(self.suffix):
+                stat = os.stat(path)
+                found.append((stat.st_mtime, name[:-len(self.suffix)], stat.st_size))
+        for _, key, size in sorted(found):
+            self._disk[key] = size
+            self.disk_bytes += size
+        self._remove(self._evict_disk())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.suffix)
+
+    async def get(self, key: str):
+        """The cached bytes for `key`, or None."""
+        data = self._memory.get(key)
+        if data is not None:
+            self.memory_hits += 1
+            self._memory.move_to_end(key)
+            return data
+        if key in self._disk:
+            try:
+                data = await asyncio.to_thread(self._read, key)
+            except OSError:
+                self.disk_bytes -= self._disk.pop(key, 0)
+            else:
+                self.disk_hits += 1
+                self._disk.move_to_end(key)
+                self._remember(key, data)
+                return data
+        self.misses += 1
+        return None
+
+    def _read(self, key: str) -> bytes:
+        with open(self._path(key), "rb") as f:
+            data = f.read()
+        os.utime(self._path(key))
+        return data
+
+    async def put(self, key: str, data: bytes):
+        self._remember(key, data)
+        if self.directory and key not in self._disk:
+            try:
+                await asyncio.to_thread(self._write, key, data)
+            except OSError as e:
+                print(f"Error writing rendered image to disk: {e}")
+                return
+            self._disk[key] = len(data)
+            self.disk_bytes += len(data)
+            evicted = self._evict_disk()
+            if evicted:
+                await asyncio.to_thread(self._remove, evicted)
+
+    def _remember(self, key: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self.memory_bytes -= len(old)
+        self._memory[key] = data
+        self.memory_bytes += len(data)
+        while self.memory_bytes > self.max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self.memory_bytes -= len(evicted)
+
+    def _write(self, key: str, data: bytes):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, self._path(key))
+
+    def _evict_disk(self) -> list:
+        """Drop least recently used entries over the disk budget; returns their keys for _remove."""
+        evicted = []
+        while self.disk_bytes > self.disk_max_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self.disk_bytes -= size
+            evicted.append(key)
+        return evicted
+
+    def _remove(self, keys):
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        hits = self.memory_hits + self.disk_hits
+        ratio = hits / lookups if lookups else 0
+        stats = {
+            "hit ratio": f"{ratio:.0%} ({self.memory_hits} memory + {self.disk_hits} disk / {lookups})",
+            "memory": f"{self.memory_bytes / 1024 / 1024:.1f} / {self.max_bytes / 1024 / 1024:.0f} MiB ({len(self._memory)} images)",
+        }
+        if self.directory:
+            stats["disk"] = f"{self.disk_bytes / 1024 / 1024:.1f} / {self.disk_max_bytes / 1024 / 1024:.0f} MiB ({len(self._disk)} images)"
+        return stats
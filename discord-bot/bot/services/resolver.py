@@ -0,0 +1,143 @@
+import json
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlparse
+
+from core import metrics
+
+METADATA_FIELDS = ("title", "uploader", "duration", "thumbnail")
+
+def stream_expiry(stream_url: str, default_ttl: float) -> float:
+    """When a direct stream URL stops working: its `expire=` parameter, else now + `default_ttl`."""
+    query = parse_qs(urlparse(stream_url).query)
+    try:
+        return float(query["expire"][0])
+    except (KeyError, ValueError):
+        pass
+    # some hosts put it in the path as /expire/<ts>/
+    parts = urlparse(stream_url).path.split("/")
+    if "expire" in parts:
+        idx = parts.index("expire")
+        if idx + 1 < len(parts) and parts[idx + 1].isdigit():
+            return float(parts[idx + 1])
+    return time.time() + default_ttl
+
+class TrackResolver:
+    """
+    Two-tier cache in front of the extraction service. Stable metadata (title,
+    uploader, duration, thumbnail) is kept in an in-memory LRU backed by the
+    database, so it survives restarts. The direct stream URL is short-lived and
+    only kept in memory until its `expire=` time. A cached stream URL that has
+    been sitting for a while is probed before use and re-extracted on a 403.
+    """
+
+    def __init__(self, extractor, http, storage, max_entries: int = 512, max_age: float = 30 * 24 * 60 * 60,
+                 default_ttl: float = 60 * 60, margin: float = 60, probe_after: float = 60):
+        self.extractor = extractor
+        self.http = http
+        self.storage = storage
+        self.max_entries = max_entries
+        self.max_age = max_age        # stored metadata older than this is re-extracted
+        self.default_ttl = default_ttl
+        self.margin = margin          # treat a URL as expired this many seconds early
+        self.probe_after = probe_after
+        self.metadata_cache = OrderedDict()  # url -> metadata dict
+        self.streams = {}                    # url -> (stream url, expires at, resolved at, audio codec)
+        self.metadata_hits = 0
+        self.metadata_misses = 0
+        self.stream_hits = 0
+        self.stream_misses = 0
+        self.refreshes = 0
+
+    async def start(self):
+        pruned = await self.storage.prune_track_metadata(self.max_age)
+        if pruned:
+            print(f"Pruned {pruned} stale track metadata entr{'y' if pruned == 1 else 'ies'}")
+        metrics.register("Resolver", self.stats)
+
+    def close(self):
+        metrics.unregister("Resolver")
+
+    def _remember_metadata(self, url: str, metadata: dict):
+        self.metadata_cache[url] = metadata
+        self.metadata_cache.move_to_end(url)
+        while len(self.metadata_cache) > self.max_entries:
+            self.metadata_cache.popitem(last=False)
+
+    async def _extract(self, url: str) -> dict:
+        """Run a fresh extraction and fill both tiers from it."""
+        info = await self.extractor.extract(url)
+        metadata = {field: info.get(field) for field in METADATA_FIELDS}
+        self._remember_metadata(url, metadata)
+        await self.storage.put_track_metadata(url, json.dumps(metadata))
+        stream_url = info.get("url")
+        if stream_url:
+            acodec = info.get("acodec")
+            self.streams[url] = (stream_url, stream_expiry(stream_url, self.default_ttl), time.time(),
+                                 acodec if acodec and acodec != "none" else None)
+        # Drop stream URLs that have expired so the map stays small
+        now = time.time()
+        for key in [k for k, entry in self.streams.items() if entry[1] - self.margin <= now]:
+            del self.streams[key]
+        return metadata
+
+    def cached_metadata(self, url: str) -> dict:
+        """Metadata for `url` if it is already in memory, else an empty dict."""
+        return self.metadata_cache.get(url) or {}
+
+    async def metadata(self, url: str) -> dict:
+        """Title, uploader, duration and thumbnail for `url`, extracting only on a miss."""
+        metadata = self.metadata_cache.get(url)
+        if metadata is None:
+            stored = await self.storage.get_track_metadata(url)
+            if stored:
+                metadata = json.loads(stored)
+                self._remember_metadata(url, metadata)
+        else:
+            self.metadata_cache.move_to_end(url)
+        if metadata is not None:
+            self.metadata_hits += 1
+            return metadata
+        self.metadata_misses += 1
+        return await self._extract(url)
+
+    async def _still_valid(self, stream_url: str) -> bool:
+        try:
+            async with self.http.request("GET", stream_url, headers={"Range": "bytes=0-0"}) as resp:
+                return resp.status not in (403, 404, 410)
+        except Exception:
+            return True  # can't tell; let playback try it
+
+    async def stream(self, url: str) -> tuple:
+        """
+        (direct stream URL, audio codec or None) for `url`, re-extracting only when
+        the cached URL has expired or is refused. Raises LookupError if extraction
+        yields no stream URL. The URL is only checked here, before playback: if it
+        expires mid-track, FFmpeg's reconnects get a 403 and the track ends early.
+        """
+        cached = self.streams.get(url)
+        now = time.time()
+        if cached is not None and cached[1] - self.margin > now:
+            stream, _, resolved_at, codec = cached
+            if now - resolved_at < self.probe_after or await self._still_valid(stream):
+                self.stream_hits += 1
+                return stream, codec
+            self.refreshes += 1
+        self.stream_misses += 1
+        self.streams.pop(url, None)
+        await self._extract(url)
+        cached = self.streams.get(url)
+        if cached is None:
+            raise LookupError("No playable stream found for this track.")
+        return cached[0], cached[3]
+
+    async def stream_url(self, url: str) -> str:
+        """A playable direct stream URL for `url`."""
+        return (await self.stream(url))[0]
+
+    def stats(self) -> dict:
+        return {
+            "metadata": f"{self.metadata_hits} hit / {self.metadata_misses} miss ({len(self.metadata_cache)} cached)",
+            "stream URLs": f"{self.stream_hits} hit / {self.stream_misses} miss ({len(self.streams)} live)",
+            "403 refreshes": self.refreshes,
+        }
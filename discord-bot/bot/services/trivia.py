@@ -0,0 +1,150 @@
+import asyncio
+import time
+from collections import deque
+
+from core import metrics
+
+API_URL = "https://opentdb.com/api.php"
+TOKEN_URL = "https://opentdb.com/api_token.php"
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursting up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class TriviaPool:
+    """
+    Per-category pools of Open Trivia DB questions. Questions are pulled in bulk
+    with a session token (so they don't repeat) and topped up in the background
+    below a low-water mark, while a token bucket keeps us under opentdb's limit of
+    one request per 5 seconds per IP.
+    """
+
+    BATCH_SIZES = (50, 10, 1)  # fall back to smaller batches when a category runs short
+    MAX_RATE_LIMITED = 3       # rate-limited retries per refill before waiting for the next one
+
+    def __init__(self, http, low_water: int = 10):
+        self.http = http
+        self.low_water = low_water
+        self.bucket = TokenBucket(rate=1 / 5)
+        self.pools = {}     # category -> deque of question dicts
+        self.token = None
+        self._refills = {}  # category -> task
+        self.refill_count = 0
+        self.refill_total_ms = 0.0
+        self.last_refill_ms = 0.0
+
+    def start(self):
+        self._schedule_refill(None)
+        metrics.register("Trivia", self.stats)
+
+    async def close(self):
+        metrics.unregister("Trivia")
+        for task in self._refills.values():
+            task.cancel()
+        self._refills.clear()
+
+    async def _call(self, url: str, **params) -> dict:
+        await self.bucket.acquire()
+        return await self.http.get_json(url, params=params)
+
+    async def _ensure_token(self):
+        if self.token is None:
+            data = await self._call(TOKEN_URL, command="request")
+            self.token = data.get("token")
+
+    async def _fetch_batch(self, category) -> list:
+        await self._ensure_token()
+        sizes = list(self.BATCH_SIZES)
+        renewed = False   # a stale or exhausted token is renewed once before giving up
+        rate_limited = 0
+        while sizes:
+            params = {"amount": sizes[0], "type": "multiple"}
+            if category:
+                params["category"] = category
+            if self.token:
+                params["token"] = self.token
+            data = await self._call(API_URL, **params)
+            code = data.get("response_code")
+            if code == 0:
+                return data["results"]
+            if code == 1:
+                sizes.pop(0)  # not enough questions left for this amount
+            elif code == 5:
+                # rate limited: the next _call waits on the bucket, then asks for the same amount
+                rate_limited += 1
+                if rate_limited > self.MAX_RATE_LIMITED:
+                    return []
+            elif code in (3, 4):
+                if renewed:
+                    return []
+                if code == 3:
+                    self.token = None  # token expired; get a new one and ask again
+                    await self._ensure_token()
+                else:
+                    # every question for this query has been served; start over
+                    await self._call(TOKEN_URL, command="reset", token=self.token)
+                renewed = True
+            else:
+                raise ValueError(f"Open Trivia DB error code {code}")
+        return []
+
+    async def _refill(self, category):
+        pool = self.pools.setdefault(category, deque())
+        start = time.perf_counter()
+        try:
+            pool.extend(await self._fetch_batch(category))
+        except Exception as e:
+            print(f"Error refilling trivia pool ({category or 'any'}): {e}")
+            return
+        self.last_refill_ms = (time.perf_counter() - start) * 1000
+        self.refill_total_ms += self.last_refill_ms
+        self.refill_count += 1
+
+    def _schedule_refill(self, category):
+        task = self._refills.get(category)
+        if task is None or task.done():
+            self._refills[category] = asyncio.get_running_loop().create_task(self._refill(category))
+        return self._refills[category]
+
+    def ready(self, category: str = None) -> bool:
+        """Whether get() can answer for `category` without waiting on opentdb."""
+        return bool(self.pools.get(category or None))
+
+    async def get(self, category: str = None) -> dict:
+        """Pop a question for `category` (None for any), refilling in the background."""
+        category = category or None
+        pool = self.pools.setdefault(category, deque())
+        if not pool:
+            await self._schedule_refill(category)
+        if not pool:
+            raise LookupError("No trivia questions available right now.")
+        question = pool.popleft()
+        if len(pool) < self.low_water:
+            self._schedule_refill(category)
+        return question
+
+    def stats(self) -> dict:
+        avg = self.refill_total_ms / self.refill_count if self.refill_count else 0
+        stats = {f"pool {category or 'any'}": len(pool) for category, pool in self.pools.items()}
+        stats.update({
+            "refills": self.refill_count,
+            "refill latency": f"{self.last_refill_ms:.0f} ms last, {avg:.0f} ms avg",
+        })
+        return stats
@@ -0,0 +1,75 @@
+import asyncio
+import time
+
+import discord
+
+from core import metrics
+
+class UserNameCache:
+    """
+    Bot-wide TTL cache of user names for IDs that aren't in a guild's member
+    cache. Missing IDs are fetched concurrently, at most `concurrency` REST calls
+    at a time, and unknown users are remembered too so they aren't refetched.
+    """
+
+    def __init__(self, bot, ttl: float = 60 * 60, concurrency: int = 5):
+        self.bot = bot
+        self.ttl = ttl
+        self._names = {}  # user_id -> (name, expires)
+        self.concurrency = concurrency
+        self._semaphore = None
+        self.hits = 0
+        self.fetches = 0
+
+    def start(self):
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        metrics.register("User names", self.stats)
+
+    def close(self):
+        metrics.unregister("User names")
+
+    def _cached(self, user_id: int):
+        entry = self._names.get(user_id)
+        if entry is None:
+            return None
+        name, expires = entry
+        if expires < time.monotonic():
+            del self._names[user_id]
+            return None
+        return name
+
+    async def _fetch(self, user_id: int) -> str:
+        async with self._semaphore:
+            self.fetches += 1
+            try:
+                name = (await self.bot.fetch_user(user_id)).name
+            except (discord.NotFound, discord.HTTPException):
+                name = "Unknown"
+        self._names[user_id] = (name, time.monotonic() + self.ttl)
+        return name
+
+    async def resolve(self, guild, user_ids) -> dict:
+        """Map each user ID to a display name: guild nickname if a cached member, else username."""
+        names, missing = {}, set()
+        for user_id in user_ids:
+            member = guild.get_member(user_id) if guild else None
+            if member:
+                names[user_id] = member.display_name
+                continue
+            cached = self._cached(user_id)
+            if cached is not None:
+                self.hits += 1
+                names[user_id] = cached
+            else:
+                missing.add(user_id)
+        if missing:
+            missing = list(missing)
+            for user_id, name in zip(missing, await asyncio.gather(*(self._fetch(uid) for uid in missing))):
+                names[user_id] = name
+        return names
+
+    async def name(self, guild, user_id: int) -> str:
+        return (await self.resolve(guild, [user_id]))[user_id]
+
+    def stats(self) -> dict:
+        return {"cached": len(self._names), "hits": self.hits, "fetches": self.fetches}
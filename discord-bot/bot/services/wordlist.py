@@ -0,0 +1,108 @@
+import asyncio
+import json
+import os
+import random
+
+from core import metrics
+
+WORDLIST_URL = "https://cdn.augystudios.com/hellobot/wordlist.json"
+SNAPSHOT_FILE = "wordlist_cache.json"
+# Copy shipped with the bot, used until a snapshot has been downloaded
+BUNDLED_FILE = os.path.join(os.path.dirname(__file__), "..", "commands", "wordlist.json")
+
+class WordlistStore:
+    """
+    Hangman/Wordle word list, loaded once and kept as per-length tuples plus
+    frozensets for membership tests. A local snapshot is revalidated against the
+    CDN in the background with ETag/Last-Modified, so picking a word never does I/O.
+    """
+
+    def __init__(self, http, refresh_interval: float = 6 * 60 * 60):
+        self.http = http
+        self.refresh_interval = refresh_interval
+        self.by_length = {}
+        self.sets = {}
+        self.all_words = ()
+        self.etag = None
+        self.last_modified = None
+        self._task = None
+
+    def _build(self, data: dict):
+        by_length = {}
+        for key, words in data.items():
+            if not isinstance(words, list):
+                continue
+            for word in words:
+                word = word.lower()
+                by_length.setdefault(len(word), []).append(word)
+        self.by_length = {n: tuple(words) for n, words in by_length.items()}
+        self.sets = {n: frozenset(words) for n, words in self.by_length.items()}
+        self.all_words = tuple(w for words in self.by_length.values() for w in words)
+
+    def _load_local(self) -> dict:
+        if os.path.exists(SNAPSHOT_FILE):
+            try:
+                with open(SNAPSHOT_FILE, encoding="utf-8") as f:
+                    snapshot = json.load(f)
+                self.etag = snapshot.get("etag")
+                self.last_modified = snapshot.get("last_modified")
+                return snapshot["words"]
+            except Exception as e:
+                print(f"Ignoring unreadable wordlist snapshot: {e}")
+        with open(BUNDLED_FILE, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_snapshot(self, data: dict):
+        tmp = SNAPSHOT_FILE + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"etag": self.etag, "last_modified": self.last_modified, "words": data}, f)
+        os.replace(tmp, SNAPSHOT_FILE)
+
+    async def start(self):
+        """Load the local copy, then keep it revalidated in the background."""
+        data = await asyncio.to_thread(self._load_local)
+        await asyncio.to_thread(self._build, data)
+        self._task = asyncio.get_running_loop().create_task(self._refresh_loop())
+        metrics.register("Wordlist", self.stats)
+
+    async def close(self):
+        metrics.unregister("Wordlist")
+        if self._task:
+            self._task.cancel()
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await self.revalidate()
+            except Exception as e:
+                print(f"Error refreshing wordlist: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    async def revalidate(self):
+        """Conditionally re-download the word list; returns True if it changed."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        async with self.http.request("GET", WORDLIST_URL, headers=headers) as resp:
+            if resp.status == 304:
+                return False
+            resp.raise_for_status()
+            data = json.loads(await self.http.read(resp))
+            self.etag = resp.headers.get("ETag")
+            self.last_modified = resp.headers.get("Last-Modified")
+        await asyncio.to_thread(self._build, data)
+        await asyncio.to_thread(self._save_snapshot, data)
+        return True
+
+    def random_word(self, length: int = None):
+        """Pick a random word, optionally of a given length; None if there is none."""
+        words = self.by_length.get(length, ()) if length else self.all_words
+        return random.choice(words) if words else None
+
+    def contains(self, word: str) -> bool:
+        return word in self.sets.get(len(word), ())
+
+    def stats(self) -> dict:
+        return {"words": len(self.all_words), "lengths": len(self.by_length), "etag": self.etag or "n/a"}
@@ -8,3 +8,66 @@ DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
 LOG_GUILD_ID = int(os.getenv("LOG_GUILD_ID")) if os.getenv("LOG_GUILD_ID") else None
 LOG_CHANNEL_ID = int(os.getenv("LOG_CHANNEL_ID")) if os.getenv("LOG_CHANNEL_ID") else None
 BOT_OWNER_ID = int(os.getenv("BOT_OWNER_ID")) if os.getenv("BOT_OWNER_ID") else None
+
+# Audit log pipeline (see core/logger.py)
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "1000"))
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "2.0"))
+AUDIT_OVERFLOW_POLICY = os.getenv("AUDIT_OVERFLOW_POLICY", "drop-oldest")  # drop-oldest | sample | block
+AUDIT_SAMPLE_RATE = int(os.getenv("AUDIT_SAMPLE_RATE", "10"))
+AUDIT_DISCORD_SAMPLE = float(os.getenv("AUDIT_DISCORD_SAMPLE", "1.0"))  # share of command records mirrored to LOG_CHANNEL_ID; 0 disables
+AUDIT_LOG_DIR = os.getenv("AUDIT_LOG_DIR", "logs")  # local JSON Lines audit log; empty disables
+AUDIT_LOG_MAX_BYTES = int(os.getenv("AUDIT_LOG_MAX_BYTES", str(8 * 1024 * 1024)))
+AUDIT_LOG_BACKUPS = int(os.getenv("AUDIT_LOG_BACKUPS", "10"))
+
+# Shared HTTP client (see core/http.py)
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "15"))
+HTTP_LIMIT_PER_HOST = int(os.getenv("HTTP_LIMIT_PER_HOST", "10"))
+HTTP_DNS_TTL = int(os.getenv("HTTP_DNS_TTL", "300"))
+HTTP_MAX_BYTES = int(os.getenv("HTTP_MAX_BYTES", str(20 * 1024 * 1024)))
+
+# SQLite database holding sessions, known users and the playback queue (see core/storage.py)
+DATABASE_FILE = os.getenv("DATABASE_FILE", "hellobot.db")
+
+# Known-user index is kept current from member events; a full pass over cached members runs this often
+KNOWN_USERS_RECONCILE_HOURS = float(os.getenv("KNOWN_USERS_RECONCILE_HOURS", "24"))
+
+# Per-guild playback queues are journalled to the database and compacted after this many records
+QUEUE_JOURNAL_COMPACT_EVERY = int(os.getenv("QUEUE_JOURNAL_COMPACT_EVERY", "1000"))
+
+# yt-dlp extraction runs on its own thread pool (see bot/services/extractor.py)
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", "2"))
+EXTRACT_TIMEOUT = float(os.getenv("EXTRACT_TIMEOUT", "30"))
+
+# Open the next queued track's audio this many seconds before the current one ends; 0 only pre-resolves it
+VOICE_PREOPEN_SECONDS = float(os.getenv("VOICE_PREOPEN_SECONDS", "5"))
+
+# /play with a playlist URL queues at most this many entries, editing its progress message at most this often (s)
+PLAYLIST_MAX_TRACKS = int(os.getenv("PLAYLIST_MAX_TRACKS", "200"))
+PLAYLIST_PROGRESS_INTERVAL = float(os.getenv("PLAYLIST_PROGRESS_INTERVAL", "3"))
+
+# Tracks remembered per guild for /history and "previous"; persisted to the database unless disabled
+HISTORY_SIZE = int(os.getenv("HISTORY_SIZE", "50"))
+HISTORY_PERSIST = os.getenv("HISTORY_PERSIST", "true").lower() in ("1", "true", "yes")
+
+# Audio sources (see bot/services/audio.py): Opus bitrate when FFmpeg must encode, and FFmpeg's input packet queue
+VOICE_BITRATE = int(os.getenv("VOICE_BITRATE", "128"))
+VOICE_INPUT_BUFFER = int(os.getenv("VOICE_INPUT_BUFFER", "512"))
+
+# Optional on-disk cache of played tracks' Opus audio (see bot/services/audio_cache.py); empty disables
+AUDIO_CACHE_DIR = os.getenv("AUDIO_CACHE_DIR", "")
+AUDIO_CACHE_MAX_BYTES = int(os.getenv("AUDIO_CACHE_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+
+# Font files for /profile (see bot/services/fonts.py): bundled fonts are loaded at start, downloaded ones cached on disk
+FONT_BUNDLED = [path for path in os.getenv("FONT_BUNDLED", "MicrosoftYaHei.ttf").split(",") if path]
+FONT_CACHE_DIR = os.getenv("FONT_CACHE_DIR", "font_cache")
+FONT_CACHE_MAX_BYTES = int(os.getenv("FONT_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+FONT_MAX_BYTES = int(os.getenv("FONT_MAX_BYTES", str(25 * 1024 * 1024)))
+FONT_POOL_SIZE = int(os.getenv("FONT_POOL_SIZE", "64"))
+
+# Decoded, resized avatars and banners kept in memory for /profile (see bot/services/images.py)
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Encoded /profile badges keyed by their inputs (see bot/services/render_cache.py); RENDER_CACHE_DIR adds a disk tier
+RENDER_CACHE_MAX_BYTES = int(os.getenv("RENDER_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+RENDER_CACHE_DIR = os.getenv("RENDER_CACHE_DIR", "")
+RENDER_CACHE_DISK_MAX_BYTES = int(os.getenv("RENDER_CACHE_DISK_MAX_BYTES", str(256 * 1024 * 1024)))
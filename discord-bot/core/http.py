@@ -0,0 +1,104 @@
+import json
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+
+import aiohttp
+
+from core import metrics
+
+class ResponseTooLarge(aiohttp.ClientError):
+    """Raised when a response body exceeds the configured size cap."""
+
+class HostStats:
+    __slots__ = ("requests", "errors", "total_ms", "statuses")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.statuses = {}
+
+    def summary(self) -> str:
+        avg = self.total_ms / self.requests if self.requests else 0
+        statuses = " ".join(f"{code}×{n}" for code, n in sorted(self.statuses.items()))
+        return f"{self.requests} req, {avg:.0f} ms avg, {self.errors} err {statuses}".strip()
+
+class HttpClient:
+    """
+    Bot-wide pooled HTTP client. One aiohttp session is shared by every cog so
+    keep-alive connections, TLS sessions and DNS lookups are reused. Requests get
+    default timeouts, response bodies are size-capped, and latency/status counters
+    are kept per host.
+    """
+
+    def __init__(self, limit: int = 100, limit_per_host: int = 10, dns_ttl: int = 300,
+                 timeout: float = 15, max_bytes: int = 20 * 1024 * 1024):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_ttl = dns_ttl
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_bytes = max_bytes
+        self.session = None
+        self.hosts = {}
+
+    async def start(self):
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_ttl,
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self.timeout,
+                headers={"User-Agent": "HelloBot (+https://hellobot.globalfurry.tv/)"},
+            )
+        metrics.register("HTTP", self.stats)
+
+    async def close(self):
+        metrics.unregister("HTTP")
+        if self.session and not self.session.closed:
+            await self.session.close()
+
+    @asynccontextmanager
+    async def request(self, method: str, url: str, **kwargs):
+        """Issue a request and yield the response, recording per-host stats."""
+        host = self.hosts.setdefault(urlparse(url).netloc, HostStats())
+        host.requests += 1
+        start = time.perf_counter()
+        try:
+            async with self.session.request(method, url, **kwargs) as resp:
+                host.statuses[resp.status] = host.statuses.get(resp.status, 0) + 1
+                yield resp
+        except Exception:
+            host.errors += 1
+            raise
+        finally:
+            host.total_ms += (time.perf_counter() - start) * 1000
+
+    async def read(self, resp: aiohttp.ClientResponse, max_bytes: int = None) -> bytes:
+        """Read a response body, refusing anything larger than `max_bytes`."""
+        cap = max_bytes or self.max_bytes
+        if resp.content_length is not None and resp.content_length > cap:
+            raise ResponseTooLarge(f"{resp.url} is {resp.content_length} bytes (cap {cap})")
+        chunks, size = [], 0
+        async for chunk in resp.content.iter_chunked(64 * 1024):
+            size += len(chunk)
+            if size > cap:
+                raise ResponseTooLarge(f"{resp.url} exceeds {cap} bytes")
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    async def get_bytes(self, url: str, max_bytes: int = None, **kwargs) -> bytes:
+        """GET a URL and return its body; raises on non-2xx statuses."""
+        async with self.request("GET", url, **kwargs) as resp:
+            resp.raise_for_status()
+            return await self.read(resp, max_bytes)
+
+    async def get_json(self, url: str, max_bytes: int = None, **kwargs):
+        """GET a URL and decode its body as JSON regardless of content type."""
+        return json.loads(await self.get_bytes(url, max_bytes, **kwargs))
+
+    def stats(self) -> dict:
+        return {host: s.summary() for host, s in sorted(self.hosts.items())}
@@ -1,55 +1,416 @@
 import os
+import asyncio
+from abc import ABC, abstractmethod
+import datetime
+import json
+import mmap
+import random
+import struct
+import threading
+import time
 import discord
 from discord.ext.commands import CommandInvokeError, CommandNotFound
 from dotenv import load_dotenv
 
+from core import metrics
+from config import (
+    AUDIT_QUEUE_SIZE, AUDIT_FLUSH_INTERVAL, AUDIT_OVERFLOW_POLICY, AUDIT_SAMPLE_RATE,
+    AUDIT_DISCORD_SAMPLE, AUDIT_LOG_DIR, AUDIT_LOG_MAX_BYTES, AUDIT_LOG_BACKUPS,
+)
+
 # Load environment variables from token.env
 load_dotenv("token.env")
 LOG_GUILD_ID = int(os.getenv("LOG_GUILD_ID"))
 LOG_CHANNEL_ID = int(os.getenv("LOG_CHANNEL_ID"))
 
+# ----- Audit records -----
+
+def _interaction_record(kind: str, interaction, error=None) -> dict:
+    """Snapshot the parts of an interaction the audit log needs into a plain dict."""
+    command = getattr(interaction, "command", None)
+    guild = interaction.guild
+    channel = interaction.channel
+    record = {
+        "kind": kind,
+        "ts": time.time(),
+        "command": command.name if command else None,
+        "user": str(interaction.user),
+        "user_id": interaction.user.id,
+        "guild": guild.name if guild else None,
+        "guild_id": guild.id if guild else None,
+        "channel": getattr(channel, "name", None),
+        "channel_id": channel.id if channel else None,
+        "interaction_id": interaction.id,
+    }
+    if error is not None:
+        record["error"] = str(error)
+    return record
+
+def _render_embed(record: dict) -> discord.Embed:
+    """Build the log-channel embed for an audit record."""
+    if record["kind"] == "error":
+        embed = discord.Embed(
+            title="Error Log",
+            description=f"An error occurred during command execution: {record['command']}",
+            color=discord.Color.red(),
+        )
+    else:
+        embed = discord.Embed(
+            title="Message Log",
+            description=f"Command: {record['command']} | [Message Link](https://discord.com/channels/{record['guild_id']}/{record['channel_id']}/{record['interaction_id']})",
+            color=discord.Color(0x99ff99),
+        )
+    embed.add_field(name="User", value=f"{record['user']} (ID: {record['user_id']})", inline=True)
+    embed.add_field(name="Server", value=f"{record['guild']} (ID: {record['guild_id']})", inline=True)
+    embed.add_field(name="Channel", value=f"{record['channel']} (ID: {record['channel_id']})", inline=True)
+    if record["kind"] == "error":
+        embed.add_field(name="Error", value=record["error"][:1024], inline=False)
+    embed.timestamp = datetime.datetime.fromtimestamp(record["ts"], tz=datetime.timezone.utc)
+    return embed
+
+# ----- Audit sinks -----
+
+class AuditSink(ABC):
+    """Destination for batches of audit records. Subclasses implement `write`."""
+
+    name = "sink"
+
+    def __init__(self):
+        self.counters = {"written": 0, "failed": 0, "skipped": 0}
+
+    @abstractmethod
+    async def write(self, records: list):
+        """Deliver a batch of records."""
+
+    async def close(self):
+        pass
+
+    def stats(self) -> dict:
+        return {f"{self.name} {k}": v for k, v in self.counters.items()}
+
+class DiscordChannelSink(AuditSink):
+    """
+    Posts records as embeds into LOG_CHANNEL_ID, up to 10 per message. Action
+    records can be sampled down; error records are always sent.
+    """
+
+    name = "discord"
+    MAX_EMBEDS = 10     # Discord's per-message embed limit
+    MAX_CHARS = 6000    # Discord's combined embed character limit
+
+    def __init__(self, bot, sample: float = 1.0):
+        super().__init__()
+        self.bot = bot
+        self.sample = sample
+
+    async def write(self, records: list):
+        if self.sample < 1.0:
+            kept = [r for r in records if r["kind"] == "error" or random.random() < self.sample]
+            self.counters["skipped"] += len(records) - len(kept)
+            records = kept
+        if not records:
+            return
+
+        guild = self.bot.get_guild(LOG_GUILD_ID)
+        log_channel = guild.get_channel(LOG_CHANNEL_ID) if guild else None
+        if log_channel is None:
+            print("Log guild or channel not found.")
+            self.counters["failed"] += len(records)
+            return
+
+        # Split into messages that respect Discord's per-message limits
+        messages, current, size = [], [], 0
+        for record in records:
+            embed = _render_embed(record)
+            if current and (len(current) == self.MAX_EMBEDS or size + len(embed) > self.MAX_CHARS):
+                messages.append(current)
+                current, size = [], 0
+            current.append(embed)
+            size += len(embed)
+        if current:
+            messages.append(current)
+
+        for embeds in messages:
+            try:
+                await log_channel.send(embeds=embeds)
+                self.counters["written"] += len(embeds)
+            except Exception as e:
+                print(f"Failed to send audit log batch: {e}")
+                self.counters["failed"] += len(embeds)
+
+class JsonlFileSink(AuditSink):
+    """
+    Appends records as compact JSON Lines to size-rotated files in `directory`.
+    Each segment `audit-NNNNNN.jsonl` has a sidecar `audit-NNNNNN.idx` of fixed-size
+    (timestamp, user id, guild id, offset, length) entries, so lookups can scan the
+    memory-mapped index instead of parsing the JSON.
+    """
+
+    name = "file"
+    INDEX_ENTRY = struct.Struct("<dQQQI")
+
+    def __init__(self, directory: str, max_bytes: int, backups: int):
+        super().__init__()
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        segments = self._segments()
+        self._segment = segments[-1] if segments else 1
+
+    def _segments(self) -> list:
+        numbers = []
+        for filename in os.listdir(self.directory):
+            if filename.startswith("audit-") and filename.endswith(".jsonl"):
+                try:
+                    numbers.append(int(filename[6:-6]))
+                except ValueError:
+                    pass
+        return sorted(numbers)
+
+    def _paths(self, segment: int) -> tuple:
+        base = os.path.join(self.directory, f"audit-{segment:06d}")
+        return base + ".jsonl", base + ".idx"
+
+    def _rotate(self):
+        self._segment += 1
+        segments = self._segments()
+        for old in segments[:max(0, len(segments) - self.backups)]:
+            for path in self._paths(old):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def _write_sync(self, records: list):
+        with self._lock:
+            data_path, index_path = self._paths(self._segment)
+            if os.path.exists(data_path) and os.path.getsize(data_path) >= self.max_bytes:
+                self._rotate()
+                data_path, index_path = self._paths(self._segment)
+            with open(data_path, "ab") as data, open(index_path, "ab") as index:
+                # Drop a partial entry left by a crash mid-write so later entries stay aligned
+                torn = index.tell() % self.INDEX_ENTRY.size
+                if torn:
+                    index.truncate(index.tell() - torn)
+                    index.seek(0, os.SEEK_END)
+                offset = data.tell()
+                lines, entries = [], []
+                for record in records:
+                    line = json.dumps(record, separators=(",", ":"), ensure_ascii=False).encode("utf-8") + b"\n"
+                    entries.append(self.INDEX_ENTRY.pack(
+                        record["ts"], record["user_id"] or 0, record["guild_id"] or 0, offset, len(line)
+                    ))
+                    lines.append(line)
+                    offset += len(line)
+                # Data reaches disk before the index entries that point into it, so a crash
+                # can leave unindexed lines but never an index entry past the end of the data
+                data.write(b"".join(lines))
+                data.flush()
+                os.fsync(data.fileno())
+                index.write(b"".join(entries))
+                index.flush()
+                os.fsync(index.fileno())
+
+    async def write(self, records: list):
+        try:
+            await asyncio.to_thread(self._write_sync, records)
+            self.counters["written"] += len(records)
+        except Exception as e:
+            print(f"Failed to write audit log file: {e}")
+            self.counters["failed"] += len(records)
+
+    def _query_sync(self, user_id, guild_id, limit: int) -> list:
+        results = []
+        entry_size = self.INDEX_ENTRY.size
+        with self._lock:
+            for segment in reversed(self._segments()):
+                data_path, index_path = self._paths(segment)
+                if not os.path.exists(index_path) or os.path.getsize(index_path) < entry_size:
+                    continue
+                with open(index_path, "rb") as index, open(data_path, "rb") as data:
+                    with mmap.mmap(index.fileno(), 0, access=mmap.ACCESS_READ) as idx:
+                        # Newest entries are at the end; walk backwards
+                        position = (len(idx) // entry_size - 1) * entry_size
+                        while position >= 0 and len(results) < limit:
+                            _, uid, gid, offset, length = self.INDEX_ENTRY.unpack_from(idx, position)
+                            position -= entry_size
+                            if user_id is not None and uid != user_id:
+                                continue
+                            if guild_id is not None and gid != guild_id:
+                                continue
+                            data.seek(offset)
+                            results.append(json.loads(data.read(length)))
+                if len(results) >= limit:
+                    break
+        return results
+
+    async def query(self, user_id: int = None, guild_id: int = None, limit: int = 10) -> list:
+        """Return up to `limit` newest records, optionally filtered by user and/or guild."""
+        return await asyncio.to_thread(self._query_sync, user_id, guild_id, limit)
+
+# ----- Batched audit pipeline -----
+
+_STOP = object()  # queued by AuditLogPipeline.close() to end the flusher
+
+class AuditLogPipeline:
+    """
+    Bounded in-process queue of audit records. Commands enqueue and return at once;
+    a background flusher hands batches to every configured sink whenever a batch
+    fills up or the flush interval elapses.
+    """
+
+    BATCH_SIZE = 50
+    POLICIES = ("drop-oldest", "sample", "block")
+
+    def __init__(self, maxsize: int, flush_interval: float, policy: str, sample_rate: int):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown audit overflow policy: {policy}")
+        self.maxsize = maxsize
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.sample_rate = max(1, sample_rate)
+        self.sinks = []
+        self.queue = None
+        self.counters = {"queued": 0, "dropped": 0}
+        self._task = None
+        self._sample_tick = 0
+
+    def add_sink(self, sink: AuditSink):
+        self.sinks.append(sink)
+
+    def get_sink(self, sink_type):
+        """Return the first configured sink of the given type, if any."""
+        return next((s for s in self.sinks if isinstance(s, sink_type)), None)
+
+    def start(self):
+        """Start the background flusher on the running loop (idempotent)."""
+        if self.queue is None:
+            self.queue = asyncio.Queue(maxsize=self.maxsize)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, record: dict):
+        """Enqueue a record, applying the overflow policy when the queue is full."""
+        if self.policy == "block":
+            await self.queue.put(record)
+        else:
+            if self.queue.full():
+                if self.policy == "sample":
+                    self.counters["dropped"] += 1
+                    return
+                oldest = self.queue.get_nowait()
+                self.queue.task_done()
+                self.counters["dropped"] += 1
+                if oldest is _STOP:
+                    # Never drop the stop marker; drop this record instead
+                    self.queue.put_nowait(_STOP)
+                    return
+            elif self.policy == "sample" and self.queue.qsize() >= self.maxsize // 2:
+                # Under pressure, only admit one in every `sample_rate` records
+                self._sample_tick += 1
+                if self._sample_tick % self.sample_rate:
+                    self.counters["dropped"] += 1
+                    return
+            self.queue.put_nowait(record)
+        self.counters["queued"] += 1
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            record = await self.queue.get()
+            if record is _STOP:
+                self.queue.task_done()
+                return
+            batch = [record]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    record = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if record is _STOP:
+                    # Finish the batch in hand, then exit
+                    self.queue.task_done()
+                    stopping = True
+                    break
+                batch.append(record)
+            try:
+                await self._dispatch(batch)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def _dispatch(self, batch: list):
+        for sink in self.sinks:
+            try:
+                await sink.write(batch)
+            except Exception as e:
+                print(f"Audit sink {sink.name} failed: {e}")
+                sink.counters["failed"] += len(batch)
+
+    async def close(self):
+        """Stop the flusher once its current batch is delivered, then hand whatever is still queued to the sinks."""
+        if self._task:
+            if not self._task.done():
+                await self.queue.put(_STOP)
+            try:
+                await self._task
+            except Exception as e:
+                print(f"Audit flusher failed: {e}")
+            self._task = None
+        if self.queue is not None:
+            pending = []
+            while not self.queue.empty():
+                pending.append(self.queue.get_nowait())
+                self.queue.task_done()
+            for i in range(0, len(pending), self.BATCH_SIZE):
+                await self._dispatch(pending[i:i + self.BATCH_SIZE])
+        for sink in self.sinks:
+            await sink.close()
+
+    def stats(self) -> dict:
+        stats = {**self.counters, "pending": self.queue.qsize() if self.queue else 0}
+        for sink in self.sinks:
+            stats.update(sink.stats())
+        return stats
+
+_pipeline = AuditLogPipeline(AUDIT_QUEUE_SIZE, AUDIT_FLUSH_INTERVAL, AUDIT_OVERFLOW_POLICY, AUDIT_SAMPLE_RATE)
+metrics.register("Audit Log", _pipeline.stats)
+
+def start_audit_log(bot):
+    """Configure the default sinks and start the audit flusher (idempotent)."""
+    if not _pipeline.sinks:
+        if AUDIT_LOG_DIR:
+            _pipeline.add_sink(JsonlFileSink(AUDIT_LOG_DIR, AUDIT_LOG_MAX_BYTES, AUDIT_LOG_BACKUPS))
+        if AUDIT_DISCORD_SAMPLE > 0:
+            _pipeline.add_sink(DiscordChannelSink(bot, AUDIT_DISCORD_SAMPLE))
+    _pipeline.start()
+
+async def stop_audit_log():
+    """Flush pending audit records; called when the bot closes."""
+    await _pipeline.close()
+
+async def query_audit_log(user_id: int = None, guild_id: int = None, limit: int = 10) -> list:
+    """Return the newest audit records from the local file sink, newest first."""
+    sink = _pipeline.get_sink(JsonlFileSink)
+    if sink is None:
+        return []
+    return await sink.query(user_id=user_id, guild_id=guild_id, limit=limit)
+
 async def log_action(bot, interaction):
-    guild = bot.get_guild(LOG_GUILD_ID)
-    if guild is None:
-        print("Log guild not found.")
-        return
-
-    log_channel = guild.get_channel(LOG_CHANNEL_ID)
-    if log_channel is None:
-        print("Log channel not found.")
-        return
-
-    embed = discord.Embed(
-        title="Message Log",
-        description=f"Command: {interaction.command.name} | [Message Link](https://discord.com/channels/{interaction.guild.id}/{interaction.channel.id}/{interaction.id})",
-        color=discord.Color(0x99ff99),
-    )
-    embed.add_field(name="User", value=f"{interaction.user} (ID: {interaction.user.id})", inline=True)
-    embed.add_field(name="Server", value=f"{interaction.guild.name} (ID: {interaction.guild.id})", inline=True)
-    embed.add_field(name="Channel", value=f"{interaction.channel.name} (ID: {interaction.channel.id})", inline=True)
-
-    await log_channel.send(embed=embed)
+    start_audit_log(bot)
+    await _pipeline.submit(_interaction_record("action", interaction))
 
 async def log_error(bot, interaction, error):
-    guild = bot.get_guild(LOG_GUILD_ID)
-    if guild is None:
-        print("Log guild not found.")
-        return
-    log_channel = guild.get_channel(LOG_CHANNEL_ID)
-    if log_channel is None:
-        print("Log channel not found.")
-        return
-    embed = discord.Embed(
-        title="Error Log",
-        description=f"An error occurred during command execution: {interaction.command.name}",
-        color=discord.Color.red(),
-    )
-    embed.add_field(name="User", value=f"{interaction.user} (ID: {interaction.user.id})", inline=True)
-    embed.add_field(name="Server", value=f"{interaction.guild.name} (ID: {interaction.guild.id})", inline=True)
-    embed.add_field(name="Channel", value=f"{interaction.channel.name} (ID: {interaction.channel.id})", inline=True)
-    embed.add_field(name="Error", value=str(error), inline=False)
-    await log_channel.send(embed=embed)
-    
+    start_audit_log(bot)
+    await _pipeline.submit(_interaction_record("error", interaction, error))
+
 def setup_error_handling(bot):
     @bot.event
     async def on_command_error(ctx, error):
@@ -0,0 +1,21 @@
+"""Registry of in-process stats providers, rendered by /dev stats."""
+
+_providers = {}
+
+def register(name: str, provider):
+    """Register a zero-argument callable returning a dict of stats under `name`."""
+    _providers[name] = provider
+
+def unregister(name: str):
+    """Remove a previously registered stats provider."""
+    _providers.pop(name, None)
+
+def snapshot() -> dict:
+    """Collect the current stats of every registered provider."""
+    stats = {}
+    for name, provider in list(_providers.items()):
+        try:
+            stats[name] = provider()
+        except Exception as e:
+            stats[name] = {"error": str(e)}
+    return stats
@@ -0,0 +1,334 @@
+import asyncio
+import csv
+import datetime
+import functools
+import os
+import random
+import sqlite3
+import string
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL UNIQUE,
+    datetime_now TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS known_users (
+    user_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS known_users_name ON known_users (name COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS guild_members (
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, user_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS guild_members_user ON guild_members (user_id);
+CREATE TABLE IF NOT EXISTS track_metadata (
+    url TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS play_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS play_history_guild ON play_history (guild_id, id);
+CREATE TABLE IF NOT EXISTS queue_journal (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id INTEGER NOT NULL,
+    op TEXT NOT NULL,
+    track_id TEXT,
+    data TEXT
+);
+"""
+
+def generate_session_id():
+    chars = string.ascii_lowercase + string.digits
+    return "".join(random.choice(chars) for _ in range(8))
+
+class Storage:
+    """
+    SQLite storage for bot state (sessions, known users, playback queue). Runs in
+    WAL mode so readers never block the writer, and every statement is a fixed,
+    parameterised query that sqlite3 keeps prepared in its statement cache.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False, cached_statements=256)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._drop_global_queue()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    # ----- Meta -----
+
+    def get_meta(self, key: str):
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self._lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    # ----- Sessions -----
+
+    def create_session(self) -> tuple:
+        """Record a new bot session; returns (row id, session id)."""
+        now_iso = datetime.datetime.now().isoformat()
+        with self._lock, self.conn:
+            while True:
+                session_id = generate_session_id()
+                try:
+                    cur = self.conn.execute(
+                        "INSERT INTO sessions (session_id, datetime_now) VALUES (?, ?)", (session_id, now_iso)
+                    )
+                    return cur.lastrowid, session_id
+                except sqlite3.IntegrityError:
+                    continue  # session id collision; pick another
+
+    def list_sessions(self) -> list:
+        with self._lock:
+            rows = self.conn.execute("SELECT id, session_id, datetime_now FROM sessions ORDER BY id").fetchall()
+        return [dict(row) for row in rows]
+
+    # ----- Known users -----
+
+    def add_guild_member(self, guild_id: int, user_id: int, name: str):
+        """Record that a user is in a guild, creating or renaming their known-user entry."""
+        with self._lock, self.conn:
+            self.conn.execute("INSERT OR IGNORE INTO guild_members (guild_id, user_id) VALUES (?, ?)", (guild_id, user_id))
+            self._upsert_user(user_id, name)
+
+    def remove_guild_member(self, guild_id: int, user_id: int):
+        """Drop a guild membership; the user is forgotten once they share no guild with the bot."""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM guild_members WHERE guild_id = ? AND user_id = ?", (guild_id, user_id))
+            self._forget_if_orphaned([(user_id, user_id)])
+
+    def rename_known_user(self, user_id: int, name: str):
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE known_users SET name = ? WHERE user_id = ?", (name, user_id))
+
+    def reconcile_guild(self, guild_id: int, members) -> tuple:
+        """
+        Make a guild's stored membership match `members`, an iterable of (user id, name).
+        Only the differences are written; returns (added, removed).
+        """
+        members = dict(members)
+        with self._lock, self.conn:
+            stored = {row[0] for row in self.conn.execute(
+                "SELECT user_id FROM guild_members WHERE guild_id = ?", (guild_id,)
+            )}
+            added = [(guild_id, uid) for uid in members.keys() - stored]
+            removed = [(guild_id, uid) for uid in stored - members.keys()]
+            self.conn.executemany("INSERT INTO guild_members (guild_id, user_id) VALUES (?, ?)", added)
+            self.conn.executemany("DELETE FROM guild_members WHERE guild_id = ? AND user_id = ?", removed)
+            self.conn.executemany(
+                "INSERT INTO known_users (user_id, name) VALUES (?, ?) "
+                "ON CONFLICT (user_id) DO UPDATE SET name = excluded.name WHERE name != excluded.name",
+                members.items(),
+            )
+            self._forget_if_orphaned([(uid, uid) for _, uid in removed])
+        return len(added), len(removed)
+
+    def remove_guild(self, guild_id: int):
+        """Drop every membership of a guild the bot has left."""
+        with self._lock, self.conn:
+            user_ids = [row[0] for row in self.conn.execute(
+                "SELECT user_id FROM guild_members WHERE guild_id = ?", (guild_id,)
+            )]
+            self.conn.execute("DELETE FROM guild_members WHERE guild_id = ?", (guild_id,))
+            self._forget_if_orphaned([(uid, uid) for uid in user_ids])
+
+    def forget_guilds(self, keep_guild_ids) -> int:
+        """
+        Drop memberships of every guild not in `keep_guild_ids` and forget users left
+        without a guild. Only call this after every kept guild has been reconciled.
+        """
+        keep = set(keep_guild_ids)
+        with self._lock, self.conn:
+            stale = [(row[0],) for row in self.conn.execute("SELECT DISTINCT guild_id FROM guild_members")
+                     if row[0] not in keep]
+            self.conn.executemany("DELETE FROM guild_members WHERE guild_id = ?", stale)
+            self._prune_users()
+        return len(stale)
+
+    def _upsert_user(self, user_id: int, name: str):
+        self.conn.execute(
+            "INSERT INTO known_users (user_id, name) VALUES (?, ?) "
+            "ON CONFLICT (user_id) DO UPDATE SET name = excluded.name",
+            (user_id, name),
+        )
+
+    def _forget_if_orphaned(self, params):
+        self.conn.executemany(
+            "DELETE FROM known_users WHERE user_id = ? "
+            "AND NOT EXISTS (SELECT 1 FROM guild_members WHERE user_id = ?)",
+            params,
+        )
+
+    def _prune_users(self):
+        self.conn.execute(
+            "DELETE FROM known_users WHERE user_id NOT IN (SELECT user_id FROM guild_members)"
+        )
+
+    def known_users(self) -> list:
+        """Known users as "username (userID)" strings, sorted case-insensitively."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT user_id, name FROM known_users ORDER BY name COLLATE NOCASE"
+            ).fetchall()
+        return [f"{row['name']} ({row['user_id']})" for row in rows]
+
+    def count_known_users(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM known_users").fetchone()[0]
+
+    # ----- Playback queue journal -----
+
+    def append_queue_journal(self, records):
+        """Append queue operations, an iterable of (guild id, op, track id, JSON data)."""
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO queue_journal (guild_id, op, track_id, data) VALUES (?, ?, ?, ?)", records
+            )
+
+    def queue_journal(self) -> list:
+        """Every journalled queue operation in the order it was written."""
+        with self._lock:
+            return [tuple(row) for row in self.conn.execute(
+                "SELECT guild_id, op, track_id, data FROM queue_journal ORDER BY seq"
+            )]
+
+    def compact_queue_journal(self, records):
+        """Atomically replace the journal with `records`, a snapshot of the live queues."""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM queue_journal")
+            self.conn.executemany(
+                "INSERT INTO queue_journal (guild_id, op, track_id, data) VALUES (?, ?, ?, ?)", records
+            )
+
+    # ----- Track metadata -----
+
+    def get_track_metadata(self, url: str):
+        with self._lock:
+            row = self.conn.execute("SELECT data FROM track_metadata WHERE url = ?", (url,)).fetchone()
+        return row["data"] if row else None
+
+    def put_track_metadata(self, url: str, data: str):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO track_metadata (url, data, fetched_at) VALUES (?, ?, ?)",
+                (url, data, time.time()),
+            )
+
+    def prune_track_metadata(self, max_age: float) -> int:
+        with self._lock, self.conn:
+            return self.conn.execute(
+                "DELETE FROM track_metadata WHERE fetched_at < ?", (time.time() - max_age,)
+            ).rowcount
+
+    # ----- Playback history -----
+
+    def append_history(self, guild_id: int, data: str, keep: int):
+        """Record a played track and trim the guild's history to its newest `keep` entries."""
+        with self._lock, self.conn:
+            self.conn.execute("INSERT INTO play_history (guild_id, data) VALUES (?, ?)", (guild_id, data))
+            self.conn.execute(
+                "DELETE FROM play_history WHERE guild_id = ? AND id <= "
+                "(SELECT id FROM play_history WHERE guild_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (guild_id, guild_id, keep),
+            )
+
+    def load_history(self, keep: int) -> list:
+        """The newest `keep` history entries of every guild as (guild id, data), oldest first."""
+        with self._lock:
+            return [tuple(row) for row in self.conn.execute(
+                "SELECT guild_id, data FROM ("
+                "  SELECT guild_id, data, id, ROW_NUMBER() OVER (PARTITION BY guild_id ORDER BY id DESC) AS n"
+                "  FROM play_history"
+                ") WHERE n <= ? ORDER BY id",
+                (keep,),
+            )]
+
+    def _drop_global_queue(self):
+        # Releases before per-guild queues kept one global queue table that no guild owns
+        with self._lock, self.conn:
+            if self.conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'queue'").fetchone():
+                count = self.conn.execute("SELECT COUNT(*) FROM queue").fetchone()[0]
+                self.conn.execute("DROP TABLE queue")
+                if count:
+                    print(f"Dropped {count} track(s) from the old global queue; queues are per guild now")
+
+    # ----- Legacy import -----
+
+    def import_legacy_files(self, sessions_csv: str, users_txt: str):
+        """
+        One-shot import of sessions.csv and users.txt into the database. The old
+        queue.csv is not imported: it was shared by every guild, so its tracks
+        cannot be attributed to one.
+        """
+        if self.get_meta("legacy_imported"):
+            return
+        imported = []
+        with self._lock, self.conn:
+            if os.path.exists(sessions_csv):
+                with open(sessions_csv, newline="", encoding="utf-8") as f:
+                    rows = [(row["session_id"], row["datetime_now"]) for row in csv.DictReader(f)]
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO sessions (session_id, datetime_now) VALUES (?, ?)", rows
+                )
+                imported.append(f"{len(rows)} sessions")
+            if os.path.exists(users_txt):
+                users = []
+                with open(users_txt, encoding="utf-8") as f:
+                    for line in f.read().splitlines():
+                        name, sep, user_id = line.rpartition(" (")
+                        if sep and user_id.endswith(")") and user_id[:-1].isdigit():
+                            users.append((int(user_id[:-1]), name))
+                self.conn.executemany("INSERT OR REPLACE INTO known_users (user_id, name) VALUES (?, ?)", users)
+                imported.append(f"{len(users)} known users")
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('legacy_imported', ?)",
+                              (datetime.datetime.now().isoformat(),))
+        if imported:
+            print(f"Imported legacy files into {self.path}: {', '.join(imported)}")
+
+class AsyncStorage:
+    """
+    Async facade over Storage. Every call runs on one dedicated worker thread, so
+    queries never block the event loop and the connection is used serially.
+    """
+
+    def __init__(self, storage: Storage):
+        self.storage = storage
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="storage")
+
+    def __getattr__(self, name):
+        method = getattr(self.storage, name)
+
+        async def call(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(method, *args, **kwargs))
+
+        return call
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.storage.close()
@@ -1,64 +1,70 @@
-import os
-import csv
-import string
-import datetime
-import random
-
 import discord
 from discord.ext import commands
 
-from core.logger import setup_error_handling
-from config import DISCORD_TOKEN, LOG_GUILD_ID
-from user_utils import update_known_users
+from core.logger import setup_error_handling, start_audit_log, stop_audit_log
+from core.http import HttpClient
+from core.storage import Storage, AsyncStorage
+from bot.services.countries import CountryDataset
+from bot.services.usernames import UserNameCache
+from config import DISCORD_TOKEN, LOG_GUILD_ID, HTTP_TIMEOUT, HTTP_LIMIT_PER_HOST, HTTP_DNS_TTL, HTTP_MAX_BYTES, DATABASE_FILE, KNOWN_USERS_RECONCILE_HOURS
+from user_utils import KnownUsersTracker
+
+# ----- Storage -----
+# Flat files from older versions are imported once, then left untouched
+storage = Storage(DATABASE_FILE)
+storage.import_legacy_files("sessions.csv", "users.txt")
 
 # ----- Bot setup -----
+class HelloBot(commands.AutoShardedBot):
+    def __init__(self, storage: Storage, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # SQLite-backed state; queries run off the event loop
+        self.storage = AsyncStorage(storage)
+        # Shared outbound HTTP client; cogs use bot.http_client instead of their own sessions
+        self.http_client = HttpClient(
+            limit_per_host=HTTP_LIMIT_PER_HOST,
+            dns_ttl=HTTP_DNS_TTL,
+            timeout=HTTP_TIMEOUT,
+            max_bytes=HTTP_MAX_BYTES,
+        )
+        # Country data shared by /countrychecklist and /flagmatch
+        self.countries = CountryDataset(self.http_client)
+        # Names of users outside the member cache, e.g. queue requesters who left
+        self.user_names = UserNameCache(self)
+        # Known-user index, updated from member events
+        self.known_users = KnownUsersTracker(self, interval=KNOWN_USERS_RECONCILE_HOURS * 60 * 60)
+
+    async def setup_hook(self):
+        # Start background services before any event is dispatched
+        await self.http_client.start()
+        start_audit_log(self)
+        await self.countries.start()
+        self.known_users.start()
+        self.user_names.start()
+
+    async def close(self):
+        # Flush background services before the connection goes away
+        await stop_audit_log()
+        await super().close()
+        await self.known_users.close()
+        self.user_names.close()
+        await self.countries.close()
+        await self.http_client.close()
+        self.storage.close()
+
 intents = discord.Intents.default()
 intents.message_content = True
 intents.guilds = True
 intents.members = True
 intents.voice_states = True
-bot = commands.AutoShardedBot(command_prefix="!", intents=intents)
+bot = HelloBot(storage, command_prefix="!", intents=intents)
 
 # ----- Guard to load cogs only once -----
 cogs_loaded = False
 
 # ----- Session-ID generation & logging -----
-SESSION_FILE = "sessions.csv"
-
-def generate_session_id():
-    chars = string.ascii_lowercase + string.digits
-    return "".join(random.choice(chars) for _ in range(8))
-
-# Create file + header if it doesn't exist
-if not os.path.exists(SESSION_FILE):
-    with open(SESSION_FILE, "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(["id", "session_id", "datetime_now"])
-
-# Read existing IDs & find max row-ID
-existing = set()
-max_id = 0
-with open(SESSION_FILE, newline="", encoding="utf-8") as f:
-    reader = csv.DictReader(f)
-    for row in reader:
-        existing.add(row["session_id"])
-        try:
-            row_id = int(row["id"])
-            max_id = max(max_id, row_id)
-        except ValueError:
-            pass
-
-# Pick a fresh session_id
-session_id = generate_session_id()
-while session_id in existing:
-    session_id = generate_session_id()
-
-# Append new row
-new_id = max_id + 1
-now_iso = datetime.datetime.now().isoformat()
-with open(SESSION_FILE, "a", newline="", encoding="utf-8") as f:
-    writer = csv.writer(f)
-    writer.writerow([new_id, session_id, now_iso])
+new_id, session_id = storage.create_session()
+bot.session_number = new_id  # unique per run; prefixes track IDs
 
 # ----- Activity updater -----
 async def update_activity():
@@ -97,7 +103,6 @@ async def fetch_command_ids():
         print(f"/{cmd.name} - ID: {cmd.id}")
     print("================================\n")
 
-# Event to update known users when the bot is ready
 @bot.event
 async def on_ready():
     global cogs_loaded
@@ -110,25 +115,41 @@ async def on_ready():
     await bot.tree.sync(guild=discord.Object(id=LOG_GUILD_ID))
     await bot.tree.sync(guild=discord.Object(id=576590416296542249))
     await fetch_command_ids()  # Fetch and display command IDs
-    await update_known_users(bot)  # Update known users with all guild members
     await update_activity()  # Update the status on startup
     print(f"Logged in as {bot.user} (ID: {bot.user.id}) "
           f"with {bot.shard_count} shard(s) [Session ID: {session_id}]")
 
-# Update known users and activity when joining a new guild
+# Reconcile the new guild's members and update activity when joining a guild
 @bot.event
 async def on_guild_join(guild):
     print(f"Joined new guild: {guild.name} (ID: {guild.id})")
-    await update_known_users(bot)
+    await bot.known_users.reconcile_guild(guild)
     await update_activity()
 
-# Update known users and activity when leaving a guild
+# Forget the guild's members and update activity when leaving a guild
 @bot.event
 async def on_guild_remove(guild):
     print(f"Left guild: {guild.name} (ID: {guild.id})")
-    await update_known_users(bot)
+    await bot.known_users.forget_guild(guild)
     await update_activity()
 
+# ----- Known-user deltas -----
+@bot.event
+async def on_member_join(member):
+    await bot.known_users.member_joined(member)
+
+@bot.event
+async def on_member_remove(member):
+    await bot.known_users.member_left(member)
+
+@bot.event
+async def on_member_update(before, after):
+    await bot.known_users.user_renamed(before, after)
+
+@bot.event
+async def on_user_update(before, after):
+    await bot.known_users.user_renamed(before, after)
+
 @bot.listen("on_socket_response")
 async def _debug_voice(payload):
     t = payload.get("t")
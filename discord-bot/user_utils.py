@@ -1,31 +1,108 @@
-import os
-
-USERS_FILE = "users.txt"
-
-# Ensure users.txt exists or create it
-def ensure_users_file():
-    if not os.path.exists(USERS_FILE):
-        with open(USERS_FILE, "w", encoding="utf-8") as f:
-            pass
-
-# Update known users by fetching all members from all guilds, storing as "username (userID)"
-async def update_known_users(bot):
-    ensure_users_file()
-    known_users = set()
-
-    for guild in bot.guilds:
-        async for member in guild.fetch_members(limit=None):
-            known_users.add(f"{member.name} ({member.id})")
-
-    # Sort known users alphabetically
-    sorted_users = sorted(known_users, key=lambda x: x.lower())
-    
-    # Save the sorted known users to the file
-    with open(USERS_FILE, "w", encoding="utf-8") as f:
-        f.write("\n".join(sorted_users))
-
-# Get known users from users.txt
-def get_known_users():
-    ensure_users_file()
-    with open(USERS_FILE, "r", encoding="utf-8") as f:
-        return f.read().splitlines()
+import asyncio
+import time
+
+from core import metrics
+
+# Known users live in the bot's SQLite storage (see core/storage.py)
+
+class KnownUsersTracker:
+    """
+    Keeps the known-user index current from gateway member events, writing only the
+    change each event describes. A full reconciliation runs for a newly joined
+    guild, and for every guild as a low-priority scheduled job; both read the
+    gateway member cache rather than paging the REST member list.
+    """
+
+    def __init__(self, bot, interval: float = 24 * 60 * 60, initial_delay: float = 5 * 60):
+        self.bot = bot
+        self.interval = interval
+        self.initial_delay = initial_delay
+        self.deltas = 0
+        self.reconciled_guilds = 0
+        self.last_sweep = None  # (finished at, duration in s, added, removed)
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._sweep_loop())
+        metrics.register("Known users", self.stats)
+
+    async def close(self):
+        metrics.unregister("Known users")
+        if self._task:
+            self._task.cancel()
+
+    # ----- Deltas from member events -----
+
+    async def member_joined(self, member):
+        self.deltas += 1
+        await self.bot.storage.add_guild_member(member.guild.id, member.id, member.name)
+
+    async def member_left(self, member):
+        self.deltas += 1
+        await self.bot.storage.remove_guild_member(member.guild.id, member.id)
+
+    async def user_renamed(self, before, after):
+        if before.name == after.name:
+            return
+        self.deltas += 1
+        await self.bot.storage.rename_known_user(after.id, after.name)
+
+    # ----- Reconciliation -----
+
+    async def reconcile_guild(self, guild) -> tuple:
+        """Bring one guild's stored members in line with the gateway cache; returns (added, removed)."""
+        if not guild.chunked:
+            await guild.chunk()
+        members = [(m.id, m.name) for m in guild.members]
+        added, removed = await self.bot.storage.reconcile_guild(guild.id, members)
+        self.reconciled_guilds += 1
+        if added or removed:
+            print(f"Reconciled known users for {guild.name} ({guild.id}): +{added} -{removed}")
+        return added, removed
+
+    async def forget_guild(self, guild):
+        await self.bot.storage.remove_guild(guild.id)
+
+    async def sweep(self):
+        """
+        Reconcile every guild one at a time, then drop guilds the bot has left.
+        Guilds are only dropped if every reconciliation succeeded.
+        """
+        start = time.perf_counter()
+        total_added = total_removed = 0
+        failed = False
+        for guild in list(self.bot.guilds):
+            try:
+                added, removed = await self.reconcile_guild(guild)
+            except Exception as e:
+                print(f"Known-user reconciliation failed for guild {guild.id}: {e}")
+                failed = True
+                continue
+            total_added += added
+            total_removed += removed
+            await asyncio.sleep(0)  # let gateway events through between guilds
+        if not failed:
+            await self.bot.storage.forget_guilds([g.id for g in self.bot.guilds])
+        self.last_sweep = (time.time(), time.perf_counter() - start, total_added, total_removed)
+
+    async def _sweep_loop(self):
+        await self.bot.wait_until_ready()
+        await asyncio.sleep(self.initial_delay)
+        while True:
+            try:
+                await self.sweep()
+            except Exception as e:
+                print(f"Known-user sweep failed: {e}")  # try again next interval
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> dict:
+        stats = {"deltas": self.deltas, "guilds reconciled": self.reconciled_guilds}
+        if self.last_sweep:
+            finished, duration, added, removed = self.last_sweep
+            stats["last sweep"] = (f"<t:{int(finished)}:R> in {duration:.1f}s, "
+                                   f"+{added} -{removed}")
+        return stats
+
+# Get known users as "username (userID)", sorted alphabetically
+async def get_known_users(bot):
+    return await bot.storage.known_users()
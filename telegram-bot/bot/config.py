@@ -9,3 +9,7 @@ API_HASH = os.getenv("API_HASH")
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 LOG_CHANNEL_ID = int(os.getenv("LOG_CHANNEL_ID")) if os.getenv("LOG_CHANNEL_ID") else None
 BOT_OWNER_ID = int(os.getenv("BOT_OWNER_ID")) if os.getenv("BOT_OWNER_ID") else None
+
+# Log digest settings (see bot/logger.py)
+LOG_DIGEST_INTERVAL = float(os.getenv("LOG_DIGEST_INTERVAL", "10"))  # seconds between digest messages
+LOG_ENTITY_TTL = float(os.getenv("LOG_ENTITY_TTL", "600"))  # seconds sender/chat metadata stays cached
@@ -1,69 +1,179 @@
+import asyncio
+import time
 from telethon import events, TelegramClient
-from .config import LOG_CHANNEL_ID
+from .config import LOG_CHANNEL_ID, LOG_DIGEST_INTERVAL, LOG_ENTITY_TTL
+
+MAX_MESSAGE_LENGTH = 4096  # Telegram's message length limit
+MAX_CONTENT_LENGTH = 1000  # Per-entry cap so one entry never fills a digest on its own
+
+class EntityCache:
+    """Small TTL cache of sender/chat metadata, keyed by id."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries = {}
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires < time.monotonic():
+            del self._entries[key]
+            return None
+        return value
+
+    def put(self, key, value):
+        self._entries[key] = (value, time.monotonic() + self.ttl)
+
+    def purge(self):
+        now = time.monotonic()
+        for key in [k for k, (_, expires) in self._entries.items() if expires < now]:
+            del self._entries[key]
+
+class LogDigest:
+    """
+    Collects log entries off the handlers' critical path and sends them to the log
+    channel as periodic digest messages. A command logged both before and after the
+    reply is coalesced into a single entry.
+    """
+
+    def __init__(self, interval: float, ttl: float):
+        self.interval = interval
+        self.senders = EntityCache(ttl)
+        self.chats = EntityCache(ttl)
+        self._pending = {}  # (chat_id, message_id) -> entry dict, in arrival order
+        self._client = None
+        self._log_channel_id = None
+        self._task = None
+
+    def add(self, event, client: TelegramClient, log_channel_id: int, bot_reply: str = None):
+        self._client = client
+        self._log_channel_id = log_channel_id
+        message = getattr(event, "message", None)
+        key = (event.chat_id, getattr(message, "id", None))
+
+        entry = self._pending.get(key)
+        if entry is not None and key[1] is not None:
+            if bot_reply:
+                entry["reply"] = bot_reply
+        else:
+            self._pending[key if key[1] is not None else (event.chat_id, id(event))] = {
+                "event": event,
+                "time": time.strftime("%H:%M:%S"),
+                "reply": bot_reply,
+            }
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while self._pending:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    async def _sender_name(self, event):
+        cached = self.senders.get(event.sender_id)
+        if cached is not None:
+            return cached
+        sender = await event.get_sender()
+        name = getattr(sender, "username", None) or "N/A"
+        self.senders.put(event.sender_id, name)
+        return name
+
+    async def _chat_title(self, event):
+        cached = self.chats.get(event.chat_id)
+        if cached is not None:
+            return cached
+        chat = await event.get_chat()
+        title = getattr(chat, "title", None) or "None"  # for groups/channels
+        self.chats.put(event.chat_id, title)
+        return title
+
+    async def _format(self, entry) -> str:
+        event = entry["event"]
+
+        # Determine the event type and extract details accordingly
+        if isinstance(event, events.NewMessage.Event):
+            message_text = event.raw_text
+        elif isinstance(event, events.CallbackQuery.Event):
+            message_text = f"Button clicked: {event.data.decode('utf-8')}"
+        else:
+            message_text = "Unknown event type"
+
+        try:
+            sender_username = await self._sender_name(event)
+            chat_title = await self._chat_title(event)
+        except Exception as e:
+            print(f"Failed to resolve log entities: {e}")
+            sender_username, chat_title = "N/A", "None"
+
+        message = getattr(event, "message", None)
+        try:
+            # t.me/c/<local_id>/<message_id> for supergroups/channels; not valid for private chats
+            message_link = message.link
+        except Exception:
+            message_link = "No link"
+        attachment_info = "Yes" if getattr(message, "media", None) else "No"
+
+        text = (
+            f"**[{entry['time']}]** Chat: {chat_title} ({event.chat_id}) | "
+            f"Sender: @{sender_username} ({event.sender_id})\n"
+            f"Message: {getattr(message, 'id', 'N/A')} | {message_link} | Attachment: {attachment_info}\n"
+            f"```{(message_text or '')[:MAX_CONTENT_LENGTH]}```"
+        )
+        if entry["reply"]:
+            text += f"\n**Bot's Reply:** ```{entry['reply'][:MAX_CONTENT_LENGTH]}```"
+        return text
+
+    async def flush(self):
+        """Format everything pending and send it as one or more digest messages."""
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        self.senders.purge()
+        self.chats.purge()
+
+        header = "**Log Digest**\n"
+        messages, current = [], header
+        for entry in pending.values():
+            text = await self._format(entry)
+            if len(current) + len(text) + 2 > MAX_MESSAGE_LENGTH and current != header:
+                messages.append(current)
+                current = header
+            current += "\n" + text + "\n"
+        messages.append(current)
+
+        for message in messages:
+            try:
+                await self._client.send_message(self._log_channel_id, message, link_preview=False)
+            except Exception as e:
+                print(f"Failed to send log message: {e}")
+        print(f"Logged {len(pending)} event(s) to Channel ID: {self._log_channel_id}")
+
+    async def close(self):
+        """Stop the periodic sender and send whatever is still pending."""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
+_digest = LogDigest(LOG_DIGEST_INTERVAL, LOG_ENTITY_TTL)
+
+async def flush_log_digest():
+    """Send pending log entries now; called when the bot shuts down."""
+    await _digest.close()
 
 async def log_event(event: events.NewMessage.Event, client: TelegramClient, log_channel_id: int, bot_reply: str = None):
     """
-    Logs the details of an incoming message or command to the specified log channel,
-    including the bot's reply if provided.
+    Queues the details of an incoming message or command, including the bot's reply
+    if provided, for the next digest sent to the specified log channel.
     """
 
-    # Determine the event type and extract details accordingly
-    if isinstance(event, events.NewMessage.Event):
-        message_text = event.raw_text
-    elif isinstance(event, events.CallbackQuery.Event):
-        message_text = f"Button clicked: {event.data.decode('utf-8')}"
-    else:
-        message_text = "Unknown event type"
-    
-    # Basic info from the event
-    sender = await event.get_sender()
-    sender_id = sender.id if sender else None
-    sender_username = sender.username if sender else "N/A"
-    
-    chat = await event.get_chat()
-    chat_id = event.chat_id
-    chat_title = getattr(chat, 'title', None)  # for groups/channels
-    message_text = event.raw_text
-    
-    # If you need a clickable message link for groups/supergroups
-    # for private chats this won't be valid
-    try:
-        # The link format for supergroups (and channels) is t.me/c/<local_id>/<message_id>
-        # local_id is chat_id without the -100 prefix for channels
-        # For normal groups, a more robust approach might be `event.message.link`
-        message_link = event.message.link
-    except:
-        # Fallback: no direct link available
-        message_link = "No link"
-    
-    if chat_id == LOG_CHANNEL_ID:
+    if event.chat_id == LOG_CHANNEL_ID:
         return  # Skip logging messages from the log channel
-    
-    # Check if there are attachments (photos, documents, etc.)
-    attachment_info = "Yes (media attached)" if event.message.media else "No"
-    
-    # Build the log message
-    log_text = (
-        f"**New Message/Command Logged**\n"
-        f"**Chat ID:** {chat_id}\n"
-        f"**Chat Title:** {chat_title}\n"
-        f"**Sender ID:** {sender_id}\n"
-        f"**Sender Username:** @{sender_username}\n"
-        f"**Message ID:** {event.message.id}\n"
-        f"**Message Link:** {message_link}\n"
-        f"**Has Attachment?:** {attachment_info}\n"
-        f"**Content:** ```{message_text}```"
-    )
-
-    if bot_reply:
-        log_text += f"\n**Bot's Reply:** ```{bot_reply}```"
-    
-    # Send the log to the specified log channel
-    try:
-        # Properly resolve the entity
-        await client.send_message(log_channel_id, log_text, link_preview=True)
-        print(f"Logging from Channel ID: {chat_id}")
-        print(f"Logging to Channel ID: {log_channel_id}")
-        print(f"---")
-    except Exception as e:
-        print(f"Failed to send log message: {e}")
+
+    _digest.add(event, client, log_channel_id, bot_reply)
@@ -2,7 +2,7 @@ import asyncio
 from telethon import TelegramClient, events
 import os
 from .config import API_ID, API_HASH, BOT_TOKEN, LOG_CHANNEL_ID
-from .logger import log_event
+from .logger import log_event, flush_log_digest
 import requests
 
 # Import commands from the cogs
@@ -107,7 +107,19 @@ class HelloBot:
                 await handle_coin_guess(event, self.client)
 
         print("HelloBot is now running...")
-        self.client.run_until_disconnected()
+        try:
+            self.client.run_until_disconnected()
+        finally:
+            self.client.loop.run_until_complete(self.shutdown())
+
+    async def shutdown(self):
+        """Send log entries still waiting for the next digest before exiting."""
+        if not self.client.is_connected():
+            await self.client.connect()
+        try:
+            await flush_log_digest()
+        finally:
+            await self.client.disconnect()
 
 if __name__ == "__main__":
     set_bot_commands()